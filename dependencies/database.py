@@ -1,48 +1,35 @@
-from sqlalchemy.orm import Session
+from typing import AsyncIterator
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.db import DatabaseService
 from services.user import UserService
 from services.item_service import ItemService
 from services.conversation import ConversationService
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from models.base import Base
-from sqlalchemy.sql import text
-import logging
-
-class DatabaseService:
-    def __init__(self, db_url: str):
-        """
-        Initialize database connection and create tables.
-        
-        Args:
-            db_url (str): Database connection URL
-        """
-        self.logger = logging.getLogger(self.__class__.__name__)
-        self.engine = create_engine(db_url)
-        
-        # Create all tables before creating the session
-        try:
-            # Enable pgvector extension
-            with self.engine.connect() as conn:
-                conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
-                conn.commit()
-            
-            # Create all tables defined in the models
-            Base.metadata.create_all(bind=self.engine)
-            
-        except Exception as e:
-            self.logger.error(f"Failed to create database tables: {str(e)}")
-            raise
-        
-        # Create session factory
-        self.SessionLocal = sessionmaker(bind=self.engine)
-        self.db = self.SessionLocal()
-
-
-    def get_user_service(self):
-        return UserService(self.db)
-
-    def get_item_service(self):
-        return ItemService(self.db)
-
-    def get_conversation_service(self):
-        return ConversationService(self.db)
+
+
+def get_database_service(request: Request) -> DatabaseService:
+    """Return the process-wide DatabaseService built once in main.py"""
+    return request.app.state.db
+
+
+async def get_db_session(db_service: DatabaseService = Depends(get_database_service)) -> AsyncIterator[AsyncSession]:
+    """
+    Yield a session scoped to the current request.
+
+    FastAPI caches dependencies per request, so every service used by one
+    request shares this session, and it is closed once the response is sent.
+    """
+    async with db_service.SessionLocal() as session:
+        yield session
+
+
+def get_user_service(session: AsyncSession = Depends(get_db_session)) -> UserService:
+    return UserService(session)
+
+
+def get_item_service(session: AsyncSession = Depends(get_db_session)) -> ItemService:
+    return ItemService(session)
+
+
+def get_conversation_service(session: AsyncSession = Depends(get_db_session)) -> ConversationService:
+    return ConversationService(session)
@@ -1,30 +1,142 @@
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, Request
 from fastapi.security import HTTPBearer
-import boto3
+from jwt import PyJWKClient
+from cachetools import TTLCache
+import jwt
+import os
+import time
+import hashlib
+import threading
+import asyncio
+import logging
+from dependencies.database import get_user_service
+from services.user import UserService
+from models.user import User
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+
+COGNITO_REGION = os.getenv("COGNITO_REGION", "us-east-1")
+COGNITO_USER_POOL_ID = os.getenv("COGNITO_USER_POOL_ID")
+COGNITO_CLIENT_ID = os.getenv("COGNITO_CLIENT_ID")
+COGNITO_ISSUER = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}"
+JWKS_REFRESH_INTERVAL = 12 * 60 * 60
+# An unknown kid may trigger a JWKS refetch at most this often
+JWKS_MIN_REFRESH_INTERVAL = 5 * 60
+logger = logging.getLogger(__name__)
 
 reusable_oauth2 = HTTPBearer(
     scheme_name='Authorization'
 )
 
-def validate_token(http_authorization_credentials=Depends(reusable_oauth2)) -> str:
+# Cognito rotates its signing keys very rarely, so keep the JWKS for a day
+_JWKS_CLIENT = PyJWKClient(
+    f"{COGNITO_ISSUER}/.well-known/jwks.json",
+    cache_keys=True,
+    lifespan=86400
+)
+
+# Signing keys by kid, replaced as a whole on each JWKS fetch; only this map
+# is consulted on the request path
+_SIGNING_KEYS = {}
+_last_jwks_fetch = 0.0
+_jwks_refresh_lock = asyncio.Lock()
+
+# Verified claims keyed by a digest of the token, so repeat requests skip the RSA verify
+_TOKEN_CACHE = TTLCache(maxsize=10_000, ttl=300)
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+async def prefetch_jwks() -> None:
+    """
+    Load the user pool JWKS into the signing key map without blocking the event loop
+    """
+    global _SIGNING_KEYS, _last_jwks_fetch
+    _last_jwks_fetch = time.monotonic()
+    jwk_set = await asyncio.to_thread(_JWKS_CLIENT.get_jwk_set, True)
+    _SIGNING_KEYS = {jwk.key_id: jwk for jwk in jwk_set.keys if jwk.key_id}
+
+async def _get_signing_key(token: str):
+    """
+    Look up the key for the token's kid => None when the kid is unknown
+
+    An unknown kid refetches the JWKS in a worker thread, at most once per
+    JWKS_MIN_REFRESH_INTERVAL, so a flood of forged kids cannot hammer Cognito.
+    """
+    kid = jwt.get_unverified_header(token).get('kid')
+    signing_key = _SIGNING_KEYS.get(kid)
+    if signing_key is None and time.monotonic() - _last_jwks_fetch > JWKS_MIN_REFRESH_INTERVAL:
+        async with _jwks_refresh_lock:
+            if kid not in _SIGNING_KEYS and time.monotonic() - _last_jwks_fetch > JWKS_MIN_REFRESH_INTERVAL:
+                await prefetch_jwks()
+        signing_key = _SIGNING_KEYS.get(kid)
+    return signing_key
+
+async def refresh_jwks_periodically(interval: int = JWKS_REFRESH_INTERVAL) -> None:
+    """
+    Keep the cached JWKS warm so validate_token never fetches it on the request path
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await prefetch_jwks()
+        except Exception as e:
+            logger.error(f"Failed to refresh JWKS: {str(e)}")
+
+async def validate_token(http_authorization_credentials=Depends(reusable_oauth2)) -> dict:
     """
-    Decode JWT token to get username => return username
+    Verify the Cognito ID token locally against the user pool JWKS => return its claims
+
+    Only ID tokens are accepted (token_use == 'id', aud == COGNITO_CLIENT_ID):
+    access tokens carry no aud and no email claims, and get_current_user
+    resolves the user by email.
     """
-    client = boto3.client('cognito-idp', region_name='us-east-1')
+    token = http_authorization_credentials.credentials
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+    with _TOKEN_CACHE_LOCK:
+        claims = _TOKEN_CACHE.get(cache_key)
+    if claims and claims['exp'] > time.time():
+        return claims
+
     try:
-        user = client.get_user(
-            AccessToken=http_authorization_credentials.credentials
+        signing_key = await _get_signing_key(token)
+        if signing_key is None:
+            raise jwt.InvalidKeyError("Unknown signing key")
+        claims = jwt.decode(
+            token,
+            signing_key.key,
+            algorithms=["RS256"],
+            audience=COGNITO_CLIENT_ID,
+            issuer=COGNITO_ISSUER
         )
-    except Exception as _:
+        if claims.get('token_use') != 'id':
+            raise jwt.InvalidTokenError("Not an ID token")
+    except Exception:
         raise HTTPException(
             status_code=401,
             detail="Could not validate credentials",
         )
-    is_verified = user['UserAttributes'][1]['Value']
-    if is_verified != 'true':
+    is_verified = claims.get('email_verified')
+    if is_verified not in (True, 'true'):
         raise HTTPException(
             status_code=403,
             detail="User is not verified",
         )
-    return user
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE[cache_key] = claims
+    return claims
+
 
+async def get_current_user(
+    request: Request,
+    current_user: dict = Depends(validate_token),
+    user_service: UserService = Depends(get_user_service)
+) -> User:
+    """
+    Resolve the authenticated user once per request and keep it on request.state
+    """
+    user = getattr(request.state, 'user', None)
+    if user is None:
+        user = await user_service.get_user_by_email(current_user["email"])
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        request.state.user = user
+    return user
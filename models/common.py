@@ -1,6 +1,7 @@
-from datetime import datetime
+import functools
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, DateTime
+from sqlalchemy.sql import func
 from sqlalchemy.orm import declared_attr
 
 class CustomBase:
@@ -9,23 +10,32 @@ class CustomBase:
         return cls.__name__.lower()
 
     # Common columns that will be available in all models
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    @classmethod
+    @functools.cache
+    def _column_names(cls):
+        """Column names of the mapped table, computed once per class"""
+        return tuple(column.name for column in cls.__table__.columns)
+
+    @classmethod
+    @functools.cache
+    def _column_name_set(cls):
+        return frozenset(cls._column_names())
 
     def to_dict(self):
         """Convert model instance to dictionary"""
-        return {
-            column.name: getattr(self, column.name)
-            for column in self.__table__.columns
-        }
+        return {name: getattr(self, name) for name in self._column_names()}
 
     @classmethod
     def from_dict(cls, data):
         """Create model instance from dictionary"""
+        names = cls._column_name_set()
         return cls(**{
             key: value
             for key, value in data.items()
-            if hasattr(cls, key)
+            if key in names
         })
 
 Base = declarative_base(cls=CustomBase) 
\ No newline at end of file
@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.sql import func, text
+from pgvector.sqlalchemy import HALFVEC, BIT
 from sqlalchemy.dialects.postgresql import UUID
 from .base import Base
-import uuid
+import hashlib
+import numpy as np
 
 class Embedding(Base):
     """
@@ -12,24 +13,63 @@ class Embedding(Base):
     """
     __tablename__ = "embeddings"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     item_id = Column(UUID(as_uuid=True), ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
     conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     page = Column(Integer, nullable=False)
     chunk_text = Column(Text, nullable=False)
-    embedding = Column(Vector(1536)) 
+    # blake2b digest of chunk_text, used to reuse stored vectors for identical chunks
+    chunk_text_hash = Column(LargeBinary(16))
+    # Embedding model that produced the vector; vectors of different models are never compared
+    model_name = Column(String, nullable=False)
+    dimension = Column(Integer, nullable=False)
+    # fp16 storage halves row size and index bandwidth versus Vector (requires pgvector 0.7+)
+    embedding = Column(HALFVEC(1536))
+    # Sign bits of embedding: 192 bytes per row, scanned first and reranked with embedding
+    embedding_bit = Column(BIT(1536))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Define relationship with Item model
     item = relationship("Item", back_populates="embeddings")
-    messages = relationship("Message", back_populates="source_embedding")
+    messages = relationship("Message", back_populates="source_embedding", passive_deletes=True)
     conversation = relationship("Conversation", back_populates="embeddings")
 
     # Composite unique constraint and table configuration
     __table_args__ = (
         UniqueConstraint('item_id', 'page', name='uix_item_page'),
+        Index('ix_embeddings_chunk_text_hash_model', 'chunk_text_hash', 'model_name'),
+        # HNSW graph index for cosine similarity search; m=16 keeps build time low without losing recall
+        Index(
+            'ix_embeddings_hnsw',
+            'embedding',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'halfvec_cosine_ops'}
+        ),
+        Index(
+            'ix_embeddings_bit_hnsw',
+            'embedding_bit',
+            postgresql_using='hnsw',
+            postgresql_ops={'embedding_bit': 'bit_hamming_ops'}
+        ),
     )
 
+    @staticmethod
+    def hash_text(text: str) -> bytes:
+        """Digest stored in chunk_text_hash for the given chunk text"""
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    @staticmethod
+    def binary_quantize(vector) -> str:
+        """
+        Value stored in embedding_bit: one bit per dimension, set when positive.
+
+        Returned as a '0'/'1' string, the text form of a Postgres bit value;
+        pgvector's BIT type has no bind processor, so the driver needs this form.
+        """
+        bits = (np.asarray(vector, dtype=np.float32) > 0).view(np.uint8) + ord('0')
+        return bits.tobytes().decode('ascii')
+
     def __repr__(self):
         return f"<Embedding(id={self.id}, item_id={self.item_id}, page={self.page})>"
@@ -1,5 +1,4 @@
-import uuid
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
@@ -11,7 +10,7 @@ class Item(Base):
     """
     __tablename__ = "items"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     file_name = Column(String, nullable=False)
     mime_type = Column(String, nullable=False)
     uri = Column(String, nullable=False)
@@ -25,5 +24,19 @@ class Item(Base):
     conversation = relationship("Conversation", back_populates="items")
     embeddings = relationship("Embedding", back_populates="item", cascade="all, delete-orphan", lazy="dynamic")
 
+    __table_args__ = (
+        # Partial index matching the hot "active items of an owner" filter
+        Index('ix_items_owner_active', 'owner_id', 'active', postgresql_where=text('active')),
+        # Serves get_recent_items' ORDER BY last_updated DESC LIMIT n per owner
+        Index('items_owner_last_updated_idx', 'owner_id', last_updated.desc()),
+        # Trigram GIN index so search_items' ILIKE '%term%' is an index scan (needs pg_trgm)
+        Index(
+            'items_file_name_trgm_idx',
+            'file_name',
+            postgresql_using='gin',
+            postgresql_ops={'file_name': 'gin_trgm_ops'}
+        ),
+    )
+
     def __repr__(self):
         return f"<Item(id={self.id}, file_name='{self.file_name}')>" 
\ No newline at end of file
@@ -1,9 +1,8 @@
 from sqlalchemy import Column, Text, DateTime, ForeignKey, Enum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from .base import Base
-import uuid
 from enum import Enum as PyEnum
 
 class MessageRole(PyEnum):
@@ -16,12 +15,13 @@ class Message(Base):
     """
     __tablename__ = "messages"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     conversation_id = Column(UUID(as_uuid=True), ForeignKey('conversations.id', ondelete='CASCADE'), nullable=False)
     role = Column(Enum(MessageRole), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     content = Column(Text, nullable=False)
-    source_embedding_id = Column(UUID(as_uuid=True), ForeignKey('embeddings.id'), nullable=True)
+    # Cleared by the database when the embedding goes, so bulk item deletes are not blocked
+    source_embedding_id = Column(UUID(as_uuid=True), ForeignKey('embeddings.id', ondelete='SET NULL'), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
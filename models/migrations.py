@@ -0,0 +1,110 @@
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import text
+from .base import Base
+
+# Model of the vectors stored before embeddings recorded their model
+# (OpenAIEmbedding's default); only used to backfill existing rows
+LEGACY_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# create_all only creates missing tables, so columns added to existing models
+# are applied here. Every statement is idempotent and runs on each migration.
+EMBEDDING_UPGRADES = (
+    text("ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS chunk_text_hash bytea"),
+    text("ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS model_name varchar"),
+    text("ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS dimension integer"),
+    text("ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS embedding_bit bit(1536)"),
+    # vector -> halfvec rewrites the table once; the old vector_cosine_ops
+    # indexes cannot follow the type change, so they are dropped first
+    text("""
+        DO $$
+        BEGIN
+            IF (
+                SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+                WHERE attrelid = 'embeddings'::regclass AND attname = 'embedding'
+            ) <> 'halfvec(1536)' THEN
+                DROP INDEX IF EXISTS ix_embeddings_hnsw;
+                DROP INDEX IF EXISTS embeddings_embedding_idx;
+                ALTER TABLE embeddings
+                    ALTER COLUMN embedding TYPE halfvec(1536) USING embedding::halfvec(1536);
+            END IF;
+        END $$;
+    """),
+    text("UPDATE embeddings SET model_name = :model_name WHERE model_name IS NULL")
+        .bindparams(model_name=LEGACY_EMBEDDING_MODEL),
+    text("UPDATE embeddings SET dimension = coalesce(vector_dims(embedding), 1536) WHERE dimension IS NULL"),
+    text("""
+        UPDATE embeddings SET embedding_bit = binary_quantize(embedding)::bit(1536)
+        WHERE embedding_bit IS NULL AND embedding IS NOT NULL
+    """),
+    # chunk_text_hash stays NULL on old rows: blake2b is not available in SQL,
+    # and a missing hash only means those chunks are not reused
+    text("ALTER TABLE embeddings ALTER COLUMN model_name SET NOT NULL"),
+    text("ALTER TABLE embeddings ALTER COLUMN dimension SET NOT NULL"),
+)
+
+MESSAGE_UPGRADES = (
+    # Older tables reference embeddings without ON DELETE, so deleting an item
+    # whose embeddings are cited by a message failed the cascade
+    text("""
+        DO $$
+        DECLARE
+            fk name;
+        BEGIN
+            SELECT conname INTO fk FROM pg_constraint
+            WHERE conrelid = 'messages'::regclass
+              AND confrelid = 'embeddings'::regclass
+              AND contype = 'f'
+              AND confdeltype <> 'n';
+            IF fk IS NOT NULL THEN
+                EXECUTE 'ALTER TABLE messages DROP CONSTRAINT ' || quote_ident(fk);
+                ALTER TABLE messages
+                    ADD CONSTRAINT messages_source_embedding_id_fkey
+                    FOREIGN KEY (source_embedding_id) REFERENCES embeddings(id) ON DELETE SET NULL;
+            END IF;
+        END $$;
+    """),
+)
+
+
+def _apply_server_defaults(connection: Connection) -> None:
+    """
+    Set the models' server defaults (gen_random_uuid(), now()) on existing columns.
+
+    Tables created while these defaults were computed in Python have none, so
+    inserts that leave the column to the database would fail there.
+    """
+    preparer = connection.dialect.identifier_preparer
+    ddl_compiler = connection.dialect.ddl_compiler(connection.dialect, None)
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.server_default is None or column.name not in existing:
+                continue
+            connection.execute(text(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ALTER COLUMN {preparer.format_column(column)} "
+                f"SET DEFAULT {ddl_compiler.get_column_default_string(column)}"
+            ))
+
+
+def upgrade_schema(connection: Connection) -> None:
+    """
+    Bring tables created by earlier versions up to the current models.
+
+    Runs after Base.metadata.create_all, in the caller's transaction. It takes
+    exclusive table locks and scans embeddings, so it is only run by the
+    migration step (DatabaseService.create_schema), never by app or worker startup.
+
+    Args:
+        connection (Connection): Connection to run the DDL on
+    """
+    for statement in EMBEDDING_UPGRADES + MESSAGE_UPGRADES:
+        connection.execute(statement)
+    _apply_server_defaults(connection)
+    # Indexes declared on the models after their tables were created, and the
+    # HNSW index dropped for the halfvec change
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
@@ -1,16 +1,17 @@
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import Conversation
 from models.schemas import ConversationCreate
 from uuid import UUID
 import logging
 
 class ConversationService:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def create_conversation(self, user_id: UUID, data: ConversationCreate) -> Optional[Conversation]:
+    async def create_conversation(self, user_id: UUID, data: ConversationCreate) -> Optional[Conversation]:
         """
         Create a new conversation.
         
@@ -28,18 +29,18 @@ class ConversationService:
                 context=data.context
             )
             self.session.add(conversation)
-            self.session.commit()
-            self.session.refresh(conversation)
+            await self.session.commit()
+            await self.session.refresh(conversation)
             
             self.logger.info(f"Created conversation: {conversation.id}")
             return conversation
             
         except Exception as e:
-            self.session.rollback()
+            await self.session.rollback()
             self.logger.error(f"Failed to create conversation: {str(e)}")
             return None
 
-    def get_user_conversations(self, user_id: UUID) -> list[Conversation]:
+    async def get_user_conversations(self, user_id: UUID) -> list[Conversation]:
         """
         Get all conversations for a user.
         
@@ -49,12 +50,12 @@ class ConversationService:
         Returns:
             list[Conversation]: List of conversations
         """
-        return self.session.query(Conversation)\
-            .filter(Conversation.user_id == user_id)\
-            .order_by(Conversation.created_at.desc())\
-            .all()
+        stmt = select(Conversation)\
+            .where(Conversation.user_id == user_id)\
+            .order_by(Conversation.created_at.desc())
+        return (await self.session.execute(stmt)).scalars().all()
 
-    def get_conversation(self, conversation_id: UUID, user_id: UUID) -> Optional[Conversation]:
+    async def get_conversation(self, conversation_id: UUID, user_id: UUID) -> Optional[Conversation]:
         """
         Get a specific conversation.
         
@@ -65,8 +66,9 @@ class ConversationService:
         Returns:
             Optional[Conversation]: Conversation if found and owned by user, None otherwise
         """
-        return self.session.query(Conversation)\
-            .filter(
+        stmt = select(Conversation)\
+            .where(
                 Conversation.id == conversation_id,
                 Conversation.user_id == user_id
-            ).first() 
\ No newline at end of file
+            )
+        return (await self.session.execute(stmt)).scalars().first() 
\ No newline at end of file
@@ -1,34 +1,93 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.engine import make_url
 from models.base import Base
+from models.migrations import upgrade_schema
 from sqlalchemy.sql import text
+import asyncio
 import logging
+import os
+from uuid import uuid4
+
+# Shared by every engine in the app. Pre-ping stays off: behind PgBouncer in
+# transaction mode its extra SELECT 1 leaves server backends idle in transaction,
+# and the short recycle already retires connections before the pooler drops them.
+POOL_OPTIONS = dict(
+    pool_size=10,
+    max_overflow=5,
+    pool_recycle=60,
+    pool_timeout=30,
+    pool_pre_ping=False
+)
+
+# Options for synchronous psycopg2 engines (see utils/db_manager.py)
+ENGINE_OPTIONS = dict(POOL_OPTIONS, executemany_mode='values_plus_batch')
+
+# PgBouncer in transaction mode hands each transaction to any server backend,
+# so asyncpg's cached prepared statements may be missing or already taken there:
+# disable both caches and give every statement a unique name
+ASYNCPG_CONNECT_ARGS = dict(
+    statement_cache_size=0,
+    prepared_statement_cache_size=0,
+    prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__"
+)
+
+
+def to_async_url(db_url: str) -> str:
+    """Point a postgresql:// URL at the asyncpg driver"""
+    return make_url(db_url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
 
 class DatabaseService:
     def __init__(self, db_url: str):
         """
-        Initialize database connection and create tables.
+        Initialize the async database engine and session factory.
+
+        Schema creation is not done here; it runs through create_schema()
+        when RUN_MIGRATIONS=1, so regular app workers skip the DDL round-trips.
         
         Args:
             db_url (str): Database connection URL
         """
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.engine = create_engine(db_url)
+        self.engine = create_async_engine(
+            to_async_url(db_url),
+            connect_args=ASYNCPG_CONNECT_ARGS,
+            **POOL_OPTIONS
+        )
         
-        # Create all tables before creating the session
+        # Create session factory
+        self.SessionLocal = async_sessionmaker(bind=self.engine, expire_on_commit=False, autoflush=False)
+
+    async def create_schema(self):
+        """Enable required extensions, create all tables defined in the models and upgrade existing ones."""
         try:
-            # Enable pgvector extension
-            with self.engine.connect() as conn:
-                conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
-                conn.commit()
+            async with self.engine.begin() as conn:
+                # Enable pgvector, and pgcrypto for gen_random_uuid() on Postgres < 13
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pgcrypto;"))
+                # Trigram operator classes for the file_name search index
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
             
-            # Create all tables defined in the models
-            Base.metadata.create_all(bind=self.engine)
+            async with self.engine.begin() as conn:
+                # Create all tables defined in the models
+                await conn.run_sync(Base.metadata.create_all)
+                # Add what create_all skips on tables that already exist
+                await conn.run_sync(upgrade_schema)
             
         except Exception as e:
             self.logger.error(f"Failed to create database tables: {str(e)}")
             raise
-        
-        # Create session factory
-        self.SessionLocal = sessionmaker(bind=self.engine)
-        self.session = self.SessionLocal()
+
+
+if __name__ == "__main__":
+    # One-off schema setup for the migration container: python -m services.db
+    import models  # noqa: F401 - registers every table on Base.metadata
+    from dotenv import load_dotenv, find_dotenv
+    load_dotenv(find_dotenv())
+
+    async def _migrate():
+        db_service = DatabaseService(os.getenv("DATABASE_URL"))
+        await db_service.create_schema()
+        await db_service.engine.dispose()
+
+    asyncio.run(_migrate())
@@ -1,11 +1,101 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Executor
+from cachetools import LRUCache
+import asyncio
+import os
+import threading
 from llama_index.core import SimpleDirectoryReader
 from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.core.text_splitter import SentenceSplitter
+from models.embedding import Embedding
 import logging
 
+CacheKey = Tuple[str, bytes]
+
+class EmbeddingCache:
+    """
+    In-process content-addressed cache of embeddings.
+
+    Keys pair the model name with the chunk text digest, so the same
+    text embedded by another model never collides. Used from the event loop
+    and from worker threads; even LRU reads reorder the cache, so every
+    access holds the lock.
+    """
+    def __init__(self, maxsize: int = 100_000):
+        self._vectors = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_name: str, text: str) -> CacheKey:
+        return (model_name, Embedding.hash_text(text))
+
+    def get_many(self, keys: List[CacheKey]) -> Dict[CacheKey, List[float]]:
+        with self._lock:
+            return {key: self._vectors[key] for key in keys if key in self._vectors}
+
+    def set_many(self, vectors: Dict[CacheKey, List[float]]) -> None:
+        with self._lock:
+            self._vectors.update(vectors)
+
+
+class DatabaseEmbeddingCache(EmbeddingCache):
+    """
+    Embedding cache that falls back to the vectors already stored in Postgres.
+
+    Misses in the in-process cache are looked up by chunk_text_hash through a
+    DatabaseManager, so re-ingesting a document stays warm across restarts.
+    The memory tier is only touched under the lock; the database lookup runs
+    without it so other threads are not blocked on the query.
+    """
+    def __init__(self, db_manager, maxsize: int = 100_000):
+        super().__init__(maxsize=maxsize)
+        self.db_manager = db_manager
+
+    def get_many(self, keys: List[CacheKey]) -> Dict[CacheKey, List[float]]:
+        hits = super().get_many(keys)
+        missing = [key for key in keys if key not in hits]
+        if missing:
+            found = {}
+            with self.db_manager.SessionLocal() as session:
+                for model_name in {model_name for model_name, _ in missing}:
+                    stored = self.db_manager.get_embeddings_by_hash(
+                        session,
+                        [chunk_hash for key_model, chunk_hash in missing if key_model == model_name],
+                        model_name
+                    )
+                    found.update({
+                        key: stored[key[1]] for key in missing
+                        if key[0] == model_name and key[1] in stored
+                    })
+            with self._lock:
+                for key, vector in found.items():
+                    # Another thread may have cached the key while the query ran
+                    if key not in self._vectors:
+                        self._vectors[key] = vector
+            hits.update(found)
+        return hits
+
+
+def load_and_split(file_path: str, chunk_size: int, chunk_overlap: int) -> list:
+    """
+    Load a document and split it into nodes.
+
+    CPU-bound, so it runs off the event loop. Kept at module level so it can
+    be sent to a ProcessPoolExecutor.
+    """
+    if os.path.isfile(file_path):
+        reader = SimpleDirectoryReader(input_files=[file_path])
+    else:
+        reader = SimpleDirectoryReader(file_path)
+    documents = reader.load_data()
+    text_splitter = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return text_splitter.get_nodes_from_documents(documents)
+
+
 class EmbeddingService:
-    def __init__(self, openai_api_key: str, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, openai_api_key: str, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 max_concurrency: int = 16, embed_batch_size: int = 100,
+                 cache: Optional[EmbeddingCache] = None, executor: Optional[Executor] = None):
         """
         Initialize the embedding service.
         
@@ -13,14 +103,115 @@ class EmbeddingService:
             openai_api_key (str): OpenAI API key for embeddings
             chunk_size (int): Size of text chunks in tokens
             chunk_overlap (int): Number of overlapping tokens between chunks
+            max_concurrency (int): Maximum number of embedding requests in flight
+            embed_batch_size (int): Number of texts sent per embedding request
+            cache (EmbeddingCache, optional): Cache of already computed embeddings
+            executor (Executor, optional): Executor for document parsing, e.g. a
+                ProcessPoolExecutor to bypass the GIL. Defaults to a worker thread
         """
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.embed_model = OpenAIEmbedding(api_key=openai_api_key)
-        self.text_splitter = SentenceSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+        self.embed_model = OpenAIEmbedding(api_key=openai_api_key, embed_batch_size=embed_batch_size)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.embed_batch_size = embed_batch_size
+        self.cache = cache if cache is not None else EmbeddingCache()
+
+    async def _embed_texts_cached(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, only calling the embedding API once per distinct text
+        that is not already in the cache.
+        
+        Args:
+            texts (List[str]): Texts to embed
+        
+        Returns:
+            List[List[float]]: Embeddings in the same order as texts
+        """
+        model_name = self.embed_model.model_name
+        keys = [self.cache.key(model_name, text) for text in texts]
+        # Off the event loop, since a database-backed cache does blocking I/O
+        hits = await asyncio.to_thread(self.cache.get_many, keys)
+
+        # Identical chunks (headers, footers...) share a key, so each is embedded once
+        misses = {key: text for key, text in zip(keys, texts) if key not in hits}
+        if misses:
+            vectors = await self._embed_texts(list(misses.values()))
+            computed = dict(zip(misses.keys(), vectors))
+            self.cache.set_many(computed)
+            hits.update(computed)
+
+        deduplicated_count = len(texts) - len(set(keys))
+        self.logger.info(
+            f"Embedded {len(texts)} chunks: {len(misses)} requested, "
+            f"{len(set(keys)) - len(misses)} cache hits, {deduplicated_count} duplicates"
+        )
+        return [hits[key] for key in keys]
+
+    async def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts through the batch endpoint, several batches at a time.
+
+        Texts are sorted by length (longest first) before being sliced into
+        contiguous batches, so the longest text of each request, which bounds
+        its server-side time, is close to the batch average. Character length
+        stands in for token count, which would cost a tokenizer pass per text
+        on the event loop.
+        
+        Args:
+            texts (List[str]): Texts to embed
+        
+        Returns:
+            List[List[float]]: Embeddings in the same order as texts
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        embeddings = [None] * len(texts)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _embed_batch(batch: List[int]):
+            async with semaphore:
+                vectors = await self.embed_model.aget_text_embedding_batch(
+                    [texts[i] for i in batch]
+                )
+            for i, vector in zip(batch, vectors):
+                embeddings[i] = vector
+
+        await asyncio.gather(*(
+            _embed_batch(order[start:start + self.embed_batch_size])
+            for start in range(0, len(order), self.embed_batch_size)
+        ))
+        return embeddings
+
+    async def split_document(self, file_path: str) -> list:
+        """
+        Load and split a document without blocking the event loop.
+        
+        Args:
+            file_path (str): Path to the document or a directory of documents
+        
+        Returns:
+            list: Nodes of the document, without embeddings
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, load_and_split, file_path, self.chunk_size, self.chunk_overlap
         )
 
+    async def embed_nodes(self, nodes: list) -> list:
+        """
+        Set the embedding of every node, using batched and cached requests.
+        
+        Args:
+            nodes (list): Nodes returned by split_document
+        
+        Returns:
+            list: The same nodes with their embeddings
+        """
+        embeddings = await self._embed_texts_cached([node.get_content() for node in nodes])
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+        return nodes
+
     async def process_document(self, file_path: str) -> List[Dict]:
         """
         Process a document: load, split, and embed.
@@ -32,18 +223,11 @@ class EmbeddingService:
             List[Dict]: List of chunks with their embeddings
         """
         try:
-            # 1. Load document
-            loader = SimpleDirectoryReader(file_path)
-            documents = loader.load_data()
-            nodes = self.text_splitter.get_nodes_from_documents(documents)
+            # 1. Load and split the document without blocking the event loop
+            nodes = await self.split_document(file_path)
             
-            # 2. Generate embeddings for each chunk
-            for node in nodes:
-                node.embedding = await self.embed_model.aget_text_embedding(
-                    node.get_content()
-                )
-                
-            return nodes
+            # 2. Generate embeddings for the chunks in batched requests
+            return await self.embed_nodes(nodes)
             
         except Exception as e:
             raise Exception(f"Failed to process document: {str(e)}")
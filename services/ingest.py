@@ -0,0 +1,122 @@
+from typing import Dict, List, Tuple
+from services.embedding import EmbeddingService
+from utils.gdrive import GoogleDriveClient
+from functools import partial
+import asyncio
+import httpx
+import logging
+
+# Marks the end of a stage's input
+_DONE = object()
+
+class IngestPipeline:
+    """
+    Download, split and embed many Drive files as three overlapping stages.
+
+    Stages are connected by bounded asyncio queues, so a slow stage applies
+    back-pressure instead of letting work pile up in memory, and the network
+    bound embed stage keeps getting work while other files download or parse.
+    """
+    def __init__(self,
+                 drive_client: GoogleDriveClient,
+                 embedding_service: EmbeddingService,
+                 save_path: str,
+                 download_workers: int = 3,
+                 split_workers: int = 3,
+                 embed_workers: int = 3,
+                 queue_size: int = 3):
+        """
+        Initialize the ingest pipeline.
+        
+        Args:
+            drive_client (GoogleDriveClient): Client used to download the files
+            embedding_service (EmbeddingService): Service used to split and embed them
+            save_path (str): Local directory for the downloaded files
+            download_workers (int): Number of concurrent downloads
+            split_workers (int): Number of documents parsed at the same time
+            embed_workers (int): Number of documents embedded at the same time
+            queue_size (int): Maximum number of files waiting between two stages
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.drive_client = drive_client
+        self.embedding_service = embedding_service
+        self.save_path = save_path
+        self.download_workers = download_workers
+        self.split_workers = split_workers
+        self.embed_workers = embed_workers
+        self.queue_size = queue_size
+
+    async def _run_stage(self, workers: int, source: asyncio.Queue, sink: asyncio.Queue, handle) -> None:
+        """Run `workers` consumers of source, then tell the next stage it is done."""
+        async def _worker():
+            while True:
+                job = await source.get()
+                if job is _DONE:
+                    # Let the sibling workers see the sentinel too
+                    await source.put(_DONE)
+                    return
+                try:
+                    result = await handle(job)
+                except Exception as e:
+                    self.logger.error(f"Failed to ingest {job}: {str(e)}")
+                    continue
+                if result is not None:
+                    await sink.put(result)
+
+        await asyncio.gather(*(_worker() for _ in range(workers)))
+        await sink.put(_DONE)
+
+    async def _download(self, client: httpx.AsyncClient, metadata: Dict[str, Dict], file_id: str):
+        result = await self.drive_client.adownload_file(
+            client, file_id, self.save_path, metadata.get(file_id)
+        )
+        if not result['success']:
+            self.logger.error(f"Failed to download {file_id}: {result['error']}")
+            return None
+        return result['files']
+
+    async def _split(self, metadata: Dict):
+        return metadata, await self.embedding_service.split_document(metadata['local_path'])
+
+    async def _embed(self, job: Tuple[Dict, list]):
+        metadata, nodes = job
+        return metadata, await self.embedding_service.embed_nodes(nodes)
+
+    async def run(self, file_ids: List[str]) -> List[Tuple[Dict, list]]:
+        """
+        Ingest the given Drive files.
+        
+        Args:
+            file_ids (List[str]): IDs of the files to ingest
+            
+        Returns:
+            List[Tuple[Dict, list]]: File metadata and embedded nodes of every
+                file that made it through all stages
+        """
+        download_q = asyncio.Queue()
+        split_q = asyncio.Queue(maxsize=self.queue_size)
+        embed_q = asyncio.Queue(maxsize=self.queue_size)
+        done_q = asyncio.Queue()
+
+        for file_id in file_ids:
+            download_q.put_nowait(file_id)
+        download_q.put_nowait(_DONE)
+
+        # One batched metadata sweep instead of a GET per file in the download stage
+        metadata = await asyncio.to_thread(self.drive_client.batch_get_metadata, file_ids)
+        
+        async with self.drive_client.async_client() as client:
+            await asyncio.gather(
+                self._run_stage(
+                    self.download_workers, download_q, split_q,
+                    partial(self._download, client, metadata)
+                ),
+                self._run_stage(self.split_workers, split_q, embed_q, self._split),
+                self._run_stage(self.embed_workers, embed_q, done_q, self._embed),
+            )
+
+        results = []
+        while (job := done_q.get_nowait()) is not _DONE:
+            results.append(job)
+        self.logger.info(f"Ingested {len(results)} of {len(file_ids)} files")
+        return results
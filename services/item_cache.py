@@ -0,0 +1,31 @@
+from sqlalchemy.engine import RowMapping
+from cachetools import TTLCache
+from typing import List, Optional
+import threading
+
+# Short-lived cache of item listings, keyed by (email, filters). It is local to
+# this process: ItemService clears a user's entries on every item change it
+# makes, but other workers and writers outside ItemService (e.g.
+# DatabaseManager.insert_document) are only seen once entries expire.
+ITEMS_CACHE_TTL = 30
+_ITEMS_CACHE = TTLCache(maxsize=1024, ttl=ITEMS_CACHE_TTL)
+_ITEMS_CACHE_LOCK = threading.Lock()
+
+
+def get_cached_items(key: tuple) -> Optional[List[RowMapping]]:
+    """Return the cached item listing for key, if any"""
+    with _ITEMS_CACHE_LOCK:
+        return _ITEMS_CACHE.get(key)
+
+
+def cache_items(key: tuple, items: List[RowMapping]) -> None:
+    """Cache an item listing; key starts with the owner's email"""
+    with _ITEMS_CACHE_LOCK:
+        _ITEMS_CACHE[key] = items
+
+
+def invalidate_items_cache(email: str) -> None:
+    """Drop every cached item listing of the given user"""
+    with _ITEMS_CACHE_LOCK:
+        for key in [key for key in _ITEMS_CACHE if key[0] == email]:
+            _ITEMS_CACHE.pop(key, None)
@@ -1,24 +1,46 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, desc, select, insert, update, delete, lambda_stmt
+from sqlalchemy.engine import RowMapping
 from models.item import Item
+from models.embedding import Embedding
 from models.user import User
 from models.conversation import Conversation
-from typing import List, Optional
+from typing import Dict, List, Optional
+from uuid import UUID
+from collections import defaultdict
 from datetime import datetime
+from services.item_cache import invalidate_items_cache
+import numpy as np
+from asyncpg import BitString
+
+__all__ = ['ItemService']
+
+# Columns returned by the list endpoints; selected as plain rows instead of ORM objects
+ITEM_LIST_COLUMNS = (
+    Item.id,
+    Item.file_name,
+    Item.mime_type,
+    Item.uri,
+    Item.conversation_id,
+    Item.owner_id,
+    Item.last_updated,
+    Item.active,
+)
 
 class ItemService:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def get_item_by_id(self, owner: User, item_id: str) -> Optional[Item]:
+    async def get_item_by_id(self, owner: User, item_id: str) -> Optional[Item]:
         """Get a single item by ID"""
-        filters = [Item.id == item_id, Item.owner_id == owner.id]
-        query = self.session.query(Item).filter(*filters)
-        item = query.first()
-        return item
+        owner_id = owner.id
+        stmt = lambda_stmt(lambda: select(Item).where(Item.id == item_id, Item.owner_id == owner_id))
+        return (await self.session.execute(stmt)).scalars().first()
 
 
-    def get_items_by_owner(self, owner: User, active_only: bool = True) -> List[Item]:
+    async def get_items_by_owner(self, owner: User, active_only: bool = True) -> List[Item]:
         """
         Get all items for a specific owner
         
@@ -26,60 +48,129 @@ class ItemService:
             owner (str): Owner of the items
             active_only (bool): If True, return only active items. If False, return all items
         """
-        query = self.session.query(Item).filter(Item.owner_id == owner.id)
+        owner_id = owner.id
+        stmt = lambda_stmt(lambda: select(Item))
+        stmt += lambda s: s.where(Item.owner_id == owner_id)
         if active_only:
-            query = query.filter(Item.active)
-        return query.all()
+            stmt += lambda s: s.where(Item.active)
+        return (await self.session.execute(stmt)).scalars().all()
 
-    def get_items_by_conversation(self, conversation: Conversation, active_only: bool = True) -> List[Item]:
+    async def get_items_by_conversation(self, conversation: Conversation, active_only: bool = True) -> List[Item]:
         """Get all items in a specific conversation"""
-        query = self.session.query(Item).filter(Item.conversation_id == conversation.id)
+        conversation_id = conversation.id
+        stmt = lambda_stmt(lambda: select(Item))
+        stmt += lambda s: s.where(Item.conversation_id == conversation_id)
+        if active_only:
+            stmt += lambda s: s.where(Item.active)
+        return (await self.session.execute(stmt)).scalars().all()
+
+    async def get_items_by_conversations(self,
+                                         conversations: List[Conversation],
+                                         owner: User,
+                                         active_only: bool = True) -> Dict[UUID, List[Item]]:
+        """
+        Get the items of several conversations in a single query
+
+        Args:
+            conversations (List[Conversation]): Conversations to fetch items for
+            owner (User): Owner of the items
+            active_only (bool): If True, return only active items. If False, return all items
+
+        Returns:
+            Dict[UUID, List[Item]]: Items grouped by conversation ID; conversations
+                without items are missing from the mapping
+        """
+        groups = defaultdict(list)
+        if not conversations:
+            return groups
+        filters = [
+            Item.owner_id == owner.id,
+            Item.conversation_id.in_([conversation.id for conversation in conversations])
+        ]
         if active_only:
-            query = query.filter(Item.active)
-        return query.all()
+            filters.append(Item.active)
+        rows = (await self.session.execute(select(Item).where(*filters))).scalars().all()
+        for item in rows:
+            groups[item.conversation_id].append(item)
+        return groups
 
-    def search_items(self, 
+    async def search_items(self, 
                     search_term: str, 
                     owner: User,
                     mime_type: Optional[str] = None,
                     active_only: bool = True) -> List[Item]:
         """
         Search items with various filters
+
+        Built as a lambda statement so the compiled SQL is cached per
+        combination of filters and only the parameters change between calls.
         """
-        filters = []
-        filters.append(Item.owner_id == owner.id)
+        owner_id = owner.id
+        stmt = lambda_stmt(lambda: select(Item))
+        stmt += lambda s: s.where(Item.owner_id == owner_id)
         
         # Add search term filter (searches in file_name)
         if search_term:
-            filters.append(Item.file_name.ilike(f"%{search_term}%"))
+            pattern = f"%{search_term}%"
+            stmt += lambda s: s.where(Item.file_name.ilike(pattern))
 
         # Add mime type filter if provided
         if mime_type:
-            filters.append(Item.mime_type == mime_type)
+            stmt += lambda s: s.where(Item.mime_type == mime_type)
             
         # Add active filter if requested
         if active_only:
-            filters.append(Item.active)
+            stmt += lambda s: s.where(Item.active)
             
-        # Combine all filters with AND
-        query = self.session.query(Item)
-        if filters:
-            query = query.filter(and_(*filters))
-            
-        return query.all()
+        return (await self.session.execute(stmt)).scalars().all()
+
+    async def get_items_for_request(self,
+                             email: str,
+                             conversation_id: Optional[str] = None,
+                             mime_type: Optional[str] = None,
+                             active_only: bool = True,
+                             search: Optional[str] = None) -> List[RowMapping]:
+        """
+        Get the items of the user with the given email in a single query
+
+        Rows are returned as mappings straight from Core, skipping ORM
+        instantiation and the identity map.
+
+        Args:
+            email (str): Email of the owner of the items
+            conversation_id (str, optional): Only return items of this conversation
+            mime_type (str, optional): Filter by mime type
+            active_only (bool): If True, return only active items. If False, return all items
+            search (str, optional): Search term for file names
+        """
+        filters = [User.email == email]
+        if conversation_id:
+            filters.append(Item.conversation_id == conversation_id)
+        if search:
+            filters.append(Item.file_name.ilike(f"%{search}%"))
+        if mime_type:
+            filters.append(Item.mime_type == mime_type)
+        if active_only:
+            filters.append(Item.active)
+
+        stmt = select(*ITEM_LIST_COLUMNS)\
+            .join(User, Item.owner_id == User.id)\
+            .where(and_(*filters))
+        return (await self.session.execute(stmt)).mappings().all()
 
-    def get_recent_items(self, limit: int = 10, owner: Optional[str] = None) -> List[Item]:
+    async def get_recent_items(self, limit: int = 10, owner: Optional[User] = None) -> List[Item]:
         """Get recently updated items"""
-        query = self.session.query(Item)
+        stmt = select(Item)
         if owner:
-            query = query.filter(Item.owner == owner)
-        return query.order_by(desc(Item.last_updated)).limit(limit).all()
+            stmt = stmt.where(Item.owner_id == owner.id)
+        stmt = stmt.order_by(desc(Item.last_updated)).limit(limit)
+        return (await self.session.execute(stmt)).scalars().all()
 
-    def create_item(self, 
+    async def create_item(self, 
                    file_name: str,
                    mime_type: str,
                    uri: str,
-                   owner: str,
+                   owner: User,
                    conversation_id: str) -> Item:
         """Create a new item"""
         item = Item(
@@ -92,42 +183,69 @@ class ItemService:
             active=True
         )
         self.session.add(item)
-        self.session.commit()
+        await self.session.commit()
+        invalidate_items_cache(owner.email)
         return item
 
-    def update_item(self, item: Item, **kwargs) -> Optional[Item]:
+    async def bulk_insert_embeddings(self, rows: List[dict]) -> int:
+        """
+        Insert many embeddings with a single executemany statement
+
+        Args:
+            rows (List[dict]): Embedding column values, e.g. item_id, conversation_id,
+                page, chunk_text, embedding and model_name
+
+        Returns:
+            int: Number of inserted rows
+        """
+        if not rows:
+            return 0
+        for row in rows:
+            # Hand pgvector a contiguous float array instead of a list of Python floats
+            row['embedding'] = np.asarray(row['embedding'], dtype=np.float32)
+            # asyncpg encodes bit columns only from its own BitString type
+            row['embedding_bit'] = BitString(row.get('embedding_bit') or Embedding.binary_quantize(row['embedding']))
+            row.setdefault('dimension', len(row['embedding']))
+        await self.session.execute(insert(Embedding), rows)
+        await self.session.commit()
+        return len(rows)
+
+    async def update_item(self, item: Item, **kwargs) -> Optional[Item]:
         """Update an item's attributes"""
         for key, value in kwargs.items():
             if hasattr(item, key):
                 setattr(item, key, value)
                 
         item.last_updated = datetime.now()
-        self.session.commit()
+        await self.session.commit()
+        # Usually already in the identity map, loaded by get_current_user
+        owner = await self.session.get(User, item.owner_id)
+        if owner:
+            invalidate_items_cache(owner.email)
         return item
 
-    def delete_item(self, owner: str, item_id: str) -> bool:
+    async def delete_item(self, owner: User, item_id: str) -> bool:
         """Delete an item (or mark as inactive)"""
-        item = self.get_item_by_id(owner, item_id)
-        if not item:
-            return False
-            
         # Soft delete - just mark as inactive
-        item.active = False
-        item.last_updated = datetime.now()
-        self.session.commit()
-        return True
+        stmt = update(Item)\
+            .where(Item.id == item_id, Item.owner_id == owner.id)\
+            .values(active=False, last_updated=datetime.now())
+        result = await self.session.execute(stmt.execution_options(synchronize_session=False))
+        await self.session.commit()
+        invalidate_items_cache(owner.email)
+        return result.rowcount > 0
 
-    def hard_delete_item(self, owner: str, item_id: str) -> bool:
+    async def hard_delete_item(self, owner: User, item_id: str) -> bool:
         """Permanently delete an item"""
-        item = self.get_item_by_id(owner, item_id)
-        if not item:
-            return False
-            
-        self.session.delete(item)
-        self.session.commit()
-        return True
+        # Embeddings go with their item through the ON DELETE CASCADE foreign key;
+        # messages citing them keep their text, source_embedding_id is SET NULL
+        stmt = delete(Item).where(Item.id == item_id, Item.owner_id == owner.id)
+        result = await self.session.execute(stmt.execution_options(synchronize_session=False))
+        await self.session.commit()
+        invalidate_items_cache(owner.email)
+        return result.rowcount > 0
 
-    def delete_conversation_items(self, conversation: Conversation, owner: User, permanent: bool = False) -> dict:
+    async def delete_conversation_items(self, conversation: Conversation, owner: User, permanent: bool = False) -> dict:
         """
         Delete all items in a conversation
         
@@ -139,27 +257,26 @@ class ItemService:
         Returns:
             dict: Summary of the operation
         """
-        # Query items that belong to both the conversation and owner
-        query = self.session.query(Item).filter(
+        # Items that belong to both the conversation and owner, changed in one statement
+        filters = (
             Item.conversation_id == conversation.id,
             Item.owner_id == owner.id
         )
+        if permanent:
+            # Embeddings go with their item through the ON DELETE CASCADE foreign key;
+            # messages citing them keep their text, source_embedding_id is SET NULL
+            stmt = delete(Item).where(*filters)
+        else:
+            stmt = update(Item).where(*filters).values(active=False, last_updated=datetime.now())
+        
+        result = await self.session.execute(stmt.execution_options(synchronize_session=False))
+        await self.session.commit()
+        invalidate_items_cache(owner.email)
         
-        items = query.all()
-        if not items:
+        count = result.rowcount
+        if not count:
             return {"message": "No items found", "deleted_count": 0}
             
-        count = 0
-        for item in items:
-            if permanent:
-                self.session.delete(item)
-            else:
-                item.active = False
-                item.last_updated = datetime.now()
-            count += 1
-            
-        self.session.commit()
-        
         action = "permanently deleted" if permanent else "deactivated"
         return {
             "message": f"Successfully {action} {count} items",
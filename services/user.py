@@ -1,20 +1,22 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.user import User
 from typing import Optional
 import logging
 class UserService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.logger = logging.getLogger(self.__class__.__name__)
         
     
-    def get_user_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email).first()
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        result = await self.db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
     
-    def create_user(self, email: str) -> User:
+    async def create_user(self, email: str) -> User:
         user = User(email=email, display_name=email.split('@')[0])
         self.db.add(user)
-        self.db.flush()
-        self.db.expunge(user)
+        await self.db.commit()
+        await self.db.refresh(user)
         return user
     
@@ -0,0 +1,29 @@
+import pytest
+
+psycopg2_extensions = pytest.importorskip("psycopg2.extensions")
+pytest.importorskip("pgvector")
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import psycopg2 as pg_psycopg2
+from models.embedding import Embedding
+
+
+def test_binary_quantize_returns_bit_text():
+    assert Embedding.binary_quantize([0.5, -1.0, 0.0, 2.0]) == '1001'
+    assert len(Embedding.binary_quantize([0.1] * 1536)) == 1536
+
+
+def test_binary_quantize_binds_through_psycopg2():
+    dialect = pg_psycopg2.dialect()
+    value = Embedding.binary_quantize([0.5, -1.0, 0.0, 2.0])
+    compiled = insert(Embedding.__table__).values(embedding_bit=value).compile(dialect=dialect)
+    bound = compiled.construct_params()['embedding_bit']
+    processor = Embedding.__table__.c.embedding_bit.type.bind_processor(dialect)
+    if processor is not None:
+        bound = processor(bound)
+    assert psycopg2_extensions.adapt(bound).getquoted() == b"'1001'"
+
+
+def test_binary_quantize_accepted_by_asyncpg_bitstring():
+    asyncpg = pytest.importorskip("asyncpg")
+    bits = asyncpg.BitString(Embedding.binary_quantize([0.5, -1.0, 0.0, 2.0]))
+    assert bits.as_string() == '1001'
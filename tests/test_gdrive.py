@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_httplib2")
+pytest.importorskip("httpx")
+from utils.gdrive import GoogleDriveClient, _FolderDownload
+
+
+@pytest.mark.parametrize("link, expected", [
+    ("https://drive.google.com/open?id=1AbC-xyz_9", ("1AbC-xyz_9", "file")),
+    ("https://drive.google.com/uc?export=download&id=1AbC&confirm=t", ("1AbC", "file")),
+    ("https://drive.google.com/file/d/1AbC-xyz_9/view?usp=sharing", ("1AbC-xyz_9", "file")),
+    ("https://docs.google.com/document/d/1AbC/edit#heading=h.1", ("1AbC", "file")),
+    ("https://drive.google.com/drive/folders/0FoLd3r?resourcekey=0-key", ("0FoLd3r", "folder")),
+    ("https://drive.google.com/drive/u/0/folders/0FoLd3r#grid", ("0FoLd3r", "folder")),
+    ("https://example.com/some/page", None),
+])
+def test_get_gdrive_id(link, expected):
+    # get_gdrive_id only uses the class-level pattern, so skip the credentials in __init__
+    client = GoogleDriveClient.__new__(GoogleDriveClient)
+    assert client.get_gdrive_id(link) == expected
+
+
+def make_run(walkers, downloads):
+    return _FolderDownload(
+        max_depth=-1,
+        file_types=None,
+        skip_existing=False,
+        manifest=None,
+        stats={},
+        walkers=walkers,
+        downloads=downloads
+    )
+
+
+def test_folder_download_waits_for_nested_tasks():
+    processed = []
+    lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=2) as walkers, ThreadPoolExecutor(max_workers=4) as downloads:
+        run = make_run(walkers, downloads)
+
+        def _file(name):
+            with lock:
+                processed.append(name)
+
+        def _folder(depth):
+            # Like _process_folder: queue the files and subfolders before returning
+            for index in range(3):
+                run.submit(downloads, _file, f"{depth}/{index}")
+            if depth < 3:
+                run.submit(walkers, _folder, depth + 1)
+
+        run.submit(walkers, _folder, 0)
+        run.wait()
+        # Every task finished by the time wait() returns, not just the ones queued so far
+        assert len(processed) == 4 * 3
+        assert run._pending == 0
+
+
+def test_folder_download_wait_survives_failing_tasks():
+    with ThreadPoolExecutor(max_workers=2) as walkers, ThreadPoolExecutor(max_workers=2) as downloads:
+        run = make_run(walkers, downloads)
+
+        def _fail():
+            raise RuntimeError("boom")
+
+        def _folder():
+            run.submit(downloads, _fail)
+            raise RuntimeError("listing failed")
+
+        run.submit(walkers, _folder)
+        run.wait()
+        assert run._pending == 0
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+
+pytest.importorskip("llama_index.core")
+pytest.importorskip("googleapiclient")
+pytest.importorskip("httpx")
+from services.ingest import IngestPipeline, _DONE
+
+
+def make_pipeline():
+    # _run_stage only needs the logger; the Drive and embedding services are not touched
+    return IngestPipeline(drive_client=None, embedding_service=None, save_path="/tmp")
+
+
+async def drain(queue: asyncio.Queue) -> list:
+    items = []
+    while True:
+        item = await queue.get()
+        if item is _DONE:
+            return items
+        items.append(item)
+
+
+def test_run_stage_forwards_results_and_one_sentinel():
+    async def scenario():
+        source, sink = asyncio.Queue(), asyncio.Queue()
+        for job in range(10):
+            source.put_nowait(job)
+        source.put_nowait(_DONE)
+
+        async def handle(job):
+            await asyncio.sleep(0)
+            if job == 3:
+                raise ValueError("bad file")
+            # None drops the job without forwarding it
+            return None if job == 5 else job * 10
+
+        await make_pipeline()._run_stage(4, source, sink, handle)
+        results = []
+        while not sink.empty():
+            results.append(sink.get_nowait())
+        assert results.count(_DONE) == 1 and results[-1] is _DONE
+        assert sorted(results[:-1]) == [job * 10 for job in range(10) if job not in (3, 5)]
+
+    asyncio.run(scenario())
+
+
+def test_run_stage_applies_back_pressure():
+    async def scenario():
+        source, sink = asyncio.Queue(), asyncio.Queue(maxsize=1)
+        for job in range(20):
+            source.put_nowait(job)
+        source.put_nowait(_DONE)
+        handled = []
+
+        async def handle(job):
+            handled.append(job)
+            return job
+
+        workers = 2
+        stage = asyncio.create_task(make_pipeline()._run_stage(workers, source, sink, handle))
+        for _ in range(50):
+            await asyncio.sleep(0)
+        # Nobody reads the sink: one result sits in it and each worker blocks on its put
+        assert len(handled) == sink.maxsize + workers
+        consumer = asyncio.create_task(drain(sink))
+        await stage
+        assert sorted(await consumer) == list(range(20))
+
+    asyncio.run(scenario())
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import uuid
+import pytest
+
+pytest.importorskip("asyncpg")
+pytest.importorskip("pgvector")
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from models import Base, User, Conversation, Item, Embedding, Message
+from models.message import MessageRole
+from services.db import to_async_url
+from services.item_service import ItemService
+
+# Postgres with the vector extension available; each test runs in a scratch schema
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+def run_in_scratch_schema(scenario):
+    """Create the tables in a throwaway schema and run scenario(session_factory)"""
+    schema = f"test_{uuid.uuid4().hex}"
+
+    async def _run():
+        admin = create_async_engine(to_async_url(TEST_DATABASE_URL))
+        async with admin.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pgcrypto"))
+            await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+        engine = create_async_engine(
+            to_async_url(TEST_DATABASE_URL),
+            connect_args={'server_settings': {'search_path': f'{schema},public'}}
+        )
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            await scenario(async_sessionmaker(bind=engine, expire_on_commit=False))
+        finally:
+            await engine.dispose()
+            async with admin.begin() as conn:
+                await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+            await admin.dispose()
+
+    asyncio.run(_run())
+
+
+async def add_cited_embedding(session):
+    """An item with one embedding that an assistant message cites => (user, conversation, item, message)"""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", display_name="Test")
+    conversation = Conversation(user=user, title="t", context="c")
+    item = Item(file_name="doc.pdf", mime_type="application/pdf", uri="gdrive://doc",
+                owner=user, conversation=conversation, active=True)
+    embedding = Embedding(item=item, conversation=conversation, page=0, chunk_text="chunk",
+                          model_name="test-model", dimension=1536, embedding=[0.1] * 1536)
+    message = Message(conversation=conversation, user=user, role=MessageRole.ASSISTANT,
+                      content="answer", source_embedding=embedding)
+    session.add_all([user, conversation, item, embedding, message])
+    await session.commit()
+    return user, conversation, item, message
+
+
+def test_delete_conversation_items_permanent_keeps_citing_messages():
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            user, conversation, _, message = await add_cited_embedding(session)
+            result = await ItemService(session).delete_conversation_items(conversation, user, permanent=True)
+            assert result["deleted_count"] == 1
+
+            row = (await session.execute(
+                select(Message.source_embedding_id).where(Message.id == message.id)
+            )).one()
+            assert row.source_embedding_id is None
+            assert (await session.execute(select(Embedding.id))).first() is None
+
+    run_in_scratch_schema(scenario)
+
+
+def test_hard_delete_item_keeps_citing_messages():
+    async def scenario(session_factory):
+        async with session_factory() as session:
+            user, _, item, message = await add_cited_embedding(session)
+            assert await ItemService(session).hard_delete_item(user, item.id)
+
+            row = (await session.execute(
+                select(Message.source_embedding_id).where(Message.id == message.id)
+            )).one()
+            assert row.source_embedding_id is None
+            assert (await session.execute(select(Item.id))).first() is None
+
+    run_in_scratch_schema(scenario)
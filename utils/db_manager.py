@@ -1,13 +1,99 @@
 import logging
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, text, insert, select, bindparam, Integer, String, Boolean
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.engine import RowMapping
 from models.base import Base
+from services.db import ENGINE_OPTIONS
 from models.item import Item
 from models.embedding import Embedding
-from typing import List, Dict, Optional
+from pgvector.sqlalchemy import HALFVEC, BIT
+from typing import Iterator, List, Dict, Optional
 from llama_index.core.schema import Node
 from datetime import datetime
 
+# One fixed, fully parameterized statement so the SQL text never changes between calls
+SIMILAR_CHUNKS_QUERY = text("""
+    WITH candidates AS (
+        SELECT
+            e.item_id,
+            e.chunk_text,
+            e.page,
+            e.embedding <=> :query_embedding as distance
+        FROM embeddings e
+        WHERE e.embedding IS NOT NULL
+          AND e.model_name = :model_name
+        ORDER BY e.embedding <=> :query_embedding
+        LIMIT :candidate_limit
+    )
+    SELECT 
+        i.id as doc_id,
+        i.file_name,
+        i.uri,
+        i.owner_id as owner,
+        c.chunk_text,
+        c.page,
+        1 - c.distance as similarity
+    FROM candidates c
+    JOIN items i ON i.id = c.item_id
+    WHERE (:active_only = false OR i.active = true)
+    ORDER BY c.distance
+    LIMIT :limit
+""").bindparams(
+    bindparam('query_embedding', type_=HALFVEC(1536)),
+    bindparam('model_name', type_=String),
+    bindparam('candidate_limit', type_=Integer),
+    bindparam('limit', type_=Integer),
+    bindparam('active_only', type_=Boolean)
+)
+
+# Two-stage search: Hamming distance on the binary column picks candidates
+# cheaply, then the halfvec cosine distance reranks them
+BINARY_RERANK_QUERY = text("""
+    WITH candidates AS (
+        SELECT
+            e.item_id,
+            e.chunk_text,
+            e.page,
+            e.embedding
+        FROM embeddings e
+        WHERE e.embedding_bit IS NOT NULL
+          AND e.model_name = :model_name
+        ORDER BY e.embedding_bit <~> :query_bits
+        LIMIT :candidate_limit
+    ), reranked AS (
+        SELECT
+            c.item_id,
+            c.chunk_text,
+            c.page,
+            c.embedding <=> :query_embedding as distance
+        FROM candidates c
+    )
+    SELECT 
+        i.id as doc_id,
+        i.file_name,
+        i.uri,
+        i.owner_id as owner,
+        r.chunk_text,
+        r.page,
+        1 - r.distance as similarity
+    FROM reranked r
+    JOIN items i ON i.id = r.item_id
+    WHERE (:active_only = false OR i.active = true)
+    ORDER BY r.distance
+    LIMIT :limit
+""").bindparams(
+    bindparam('query_bits', type_=BIT(1536)),
+    bindparam('query_embedding', type_=HALFVEC(1536)),
+    bindparam('model_name', type_=String),
+    bindparam('candidate_limit', type_=Integer),
+    bindparam('limit', type_=Integer),
+    bindparam('active_only', type_=Boolean)
+)
+
+# hnsw.ef_search (default 40) bounds how many rows an HNSW scan can return, so
+# it is raised to the candidate count for the current transaction only
+SET_EF_SEARCH = text("SELECT set_config('hnsw.ef_search', :ef_search, true)")
+
 class DatabaseManager:
     def __init__(self, connection_string: str):
         """
@@ -20,7 +106,7 @@ class DatabaseManager:
         
         try:
             # Create SQLAlchemy engine
-            self.engine = create_engine(connection_string)
+            self.engine = create_engine(connection_string, **ENGINE_OPTIONS)
             
             # Create session factory
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
@@ -38,27 +124,16 @@ class DatabaseManager:
             with self.engine.connect() as conn:
                 # Enable pgvector extension
                 conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
+                # Enable pg_trgm for the trigram index on items.file_name (declared on the model)
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+                # create_all runs on its own connection, so the extensions must be committed first
+                conn.commit()
                 
                 # Create tables if they don't exist
                 Base.metadata.create_all(bind=self.engine)
                 
                 # Create indexes for better performance
                 conn.execute(text("""
-                    -- Create GiST index for vector similarity search if not exists
-                    DO $$ 
-                    BEGIN 
-                        IF NOT EXISTS (
-                            SELECT 1 FROM pg_class c 
-                            JOIN pg_namespace n ON n.oid = c.relnamespace 
-                            WHERE c.relname = 'embeddings_embedding_idx'
-                        ) THEN
-                            CREATE INDEX embeddings_embedding_idx 
-                            ON embeddings 
-                            USING ivfflat (embedding vector_cosine_ops)
-                            WITH (lists = 100);
-                        END IF;
-                    END $$;
-                    
                     -- Create index on items.active if not exists
                     DO $$
                     BEGIN
@@ -105,11 +180,50 @@ class DatabaseManager:
             self.logger.error(f"Failed to initialize database: {str(e)}")
             raise
 
-    def insert_document(self, nodes: List[Node], metadata: Dict) -> Optional[Item]:
+    def rebuild_vector_index(self, maintenance_work_mem: str = '2GB'):
+        """
+        Rebuild the HNSW index on embeddings.embedding without blocking writes.
+
+        The index is declared on the Embedding model; this rebuilds it in place
+        with REINDEX CONCURRENTLY, e.g. after a large bulk ingestion, and drops
+        the IVFFlat index older deployments built next to it.
+        
+        Args:
+            maintenance_work_mem (str): Memory available to the index build
+        """
+        try:
+            # CONCURRENTLY cannot run inside a transaction block
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS embeddings_embedding_idx"))
+                conn.execute(
+                    text("SELECT set_config('maintenance_work_mem', :value, false)"),
+                    {'value': maintenance_work_mem}
+                )
+                conn.execute(text("REINDEX INDEX CONCURRENTLY ix_embeddings_hnsw"))
+                conn.execute(text("RESET maintenance_work_mem"))
+                
+            self.logger.info("Rebuilt ix_embeddings_hnsw")
+            
+        except Exception as e:
+            self.logger.error(f"Failed to rebuild vector index: {str(e)}")
+            raise
+
+    def session_scope(self) -> Iterator[Session]:
+        """
+        Yield one session for a unit of work (usable as a FastAPI dependency).
+
+        All DatabaseManager methods take the session as their first argument,
+        so a caller can run several of them in one transaction.
+        """
+        with self.SessionLocal() as session:
+            yield session
+
+    def insert_document(self, session: Session, nodes: List[Node], metadata: Dict, model_name: str) -> Optional[Item]:
         """
         Insert a document and its embeddings into the database.
         
         Args:
+            session (Session): Session to run in
             nodes (List[Node]): List of LlamaIndex nodes containing text and embeddings
             metadata (Dict): Document metadata containing:
                 - id: Document ID
@@ -118,121 +232,174 @@ class DatabaseManager:
                 - uri: Document URI
                 - owner: Document owner
                 - conversation_id: Conversation ID
+            model_name (str): Embedding model that produced the node embeddings
                 
         Returns:
             Optional[Item]: Created Item object or None if failed
         """
         try:
-            session = self.SessionLocal()
+            # Create Item
+            item = Item(
+                id=metadata['id'],
+                file_name=metadata['file_name'],
+                mime_type=metadata['mime_type'],
+                uri=metadata['uri'],
+                owner=metadata['owner'],
+                conversation_id=metadata['conversation_id'],
+                last_updated=datetime.now(),
+                active=True
+            )
+            session.add(item)
+            session.flush()  # Get the item ID
             
-            try:
-                # Create Item
-                item = Item(
-                    id=metadata['id'],
-                    file_name=metadata['file_name'],
-                    mime_type=metadata['mime_type'],
-                    uri=metadata['uri'],
-                    owner=metadata['owner'],
-                    conversation_id=metadata['conversation_id'],
-                    last_updated=datetime.now(),
-                    active=True
-                )
-                session.add(item)
-                session.flush()  # Get the item ID
-                
-                # Create Embeddings for each node
-                for node in nodes:
+            # Create all Embeddings in a single executemany INSERT
+            rows = [
+                {
+                    'item_id': item.id,
+                    'conversation_id': item.conversation_id,
                     # Extract page number from node metadata
-                    page = int(node.extra_info.get('page_label', -1))
-                    
-                    embedding = Embedding(
-                        item_id=item.id,
-                        page=page,
-                        chunk_text=node.get_content(),
-                        embedding=node.embedding,
-                        last_updated=datetime.now()
-                    )
-                    session.add(embedding)
-                
-                session.commit()
-                self.logger.info(f"Successfully inserted document {item.file_name} with {len(nodes)} chunks")
-                return item
-                
-            except Exception as e:
-                session.rollback()
-                self.logger.error(f"Failed to insert document: {str(e)}")
-                return None
-                
-            finally:
-                session.close()
-                
+                    'page': int(node.extra_info.get('page_label', -1)),
+                    'chunk_text': node.get_content(),
+                    'chunk_text_hash': Embedding.hash_text(node.get_content()),
+                    'embedding': node.embedding,
+                    'embedding_bit': Embedding.binary_quantize(node.embedding),
+                    'model_name': model_name,
+                    'dimension': len(node.embedding)
+                }
+                for node in nodes
+            ]
+            if rows:
+                session.execute(insert(Embedding), rows)
+            
+            session.commit()
+            self.logger.info(f"Successfully inserted document {item.file_name} with {len(nodes)} chunks")
+            return item
+            
         except Exception as e:
-            self.logger.error(f"Database error: {str(e)}")
+            session.rollback()
+            self.logger.error(f"Failed to insert document: {str(e)}")
             return None
 
-    def get_document(self, doc_id: str) -> Optional[Item]:
+    def get_embeddings_by_hash(self, session: Session, hashes: List[bytes], model_name: str) -> Dict[bytes, List[float]]:
+        """
+        Look up already stored vectors for chunk text hashes.
+        
+        Args:
+            session (Session): Session to run in
+            hashes (List[bytes]): Values of Embedding.hash_text for the chunks
+            model_name (str): Only reuse vectors produced by this embedding model
+            
+        Returns:
+            Dict[bytes, List[float]]: Stored vector for every hash that has one
+        """
+        if not hashes:
+            return {}
+        rows = session.execute(
+            select(Embedding.chunk_text_hash, Embedding.embedding)
+            .where(
+                Embedding.chunk_text_hash.in_(hashes),
+                Embedding.model_name == model_name,
+                Embedding.embedding.isnot(None)
+            )
+            .distinct(Embedding.chunk_text_hash)
+        )
+        return {chunk_hash: vector.to_list() for chunk_hash, vector in rows}
+
+    def get_document(self, session: Session, doc_id: str) -> Optional[Item]:
         """
         Retrieve a document by its ID.
         
         Args:
+            session (Session): Session to run in
             doc_id (str): Document ID
             
         Returns:
             Optional[Item]: Item object or None if not found
         """
-        try:
-            session = self.SessionLocal()
-            return session.query(Item).filter(Item.id == doc_id).first()
-        finally:
-            session.close()
+        # Primary key lookup; served from the identity map when already loaded
+        return session.get(Item, doc_id)
 
     def search_similar_chunks(
         self,
+        session: Session,
         query_embedding: List[float],
+        model_name: str,
         limit: int = 5,
-        active_only: bool = True
-    ) -> List[Dict]:
+        active_only: bool = True,
+        candidate_multiplier: int = 10
+    ) -> List[RowMapping]:
         """
         Search for similar chunks using vector similarity.
+
+        The nearest chunks are first taken straight from the vector index and
+        only then filtered on item state, so the ANN scan is never cut short by
+        the join. When filtering on active items, candidate_multiplier times
+        the limit are fetched to leave enough rows after the filter.
         
         Args:
+            session (Session): Session to run in
             query_embedding (List[float]): Query embedding vector
+            model_name (str): Embedding model of query_embedding; only its vectors are searched
             limit (int): Maximum number of results
             active_only (bool): Whether to search only active documents
+            candidate_multiplier (int): Oversampling factor for the index scan when filtering
             
         Returns:
-            List[Dict]: List of similar chunks with their document metadata
+            List[RowMapping]: List of similar chunks with their document metadata
         """
-        try:
-            session = self.SessionLocal()
-            
-            # Build the query with active document filter if needed
-            active_filter = "AND i.active = true" if active_only else ""
-            
-            results = session.execute(text("""
-                SELECT 
-                    i.id as doc_id,
-                    i.file_name,
-                    i.uri,
-                    i.owner,
-                    e.chunk_text,
-                    e.page,
-                    1 - (e.embedding <=> :query_embedding) as similarity
-                FROM embeddings e
-                JOIN items i ON i.id = e.item_id
-                WHERE e.embedding IS NOT NULL
-                """ + active_filter + """
-                ORDER BY e.embedding <=> :query_embedding
-                LIMIT :limit
-            """), {
-                'query_embedding': query_embedding,
-                'limit': limit
-            })
-            
-            return [dict(row) for row in results]
+        candidate_limit = limit * candidate_multiplier if active_only else limit
+        
+        session.execute(SET_EF_SEARCH, {'ef_search': str(max(40, candidate_limit))})
+        results = session.execute(SIMILAR_CHUNKS_QUERY, {
+            'query_embedding': query_embedding,
+            'model_name': model_name,
+            'candidate_limit': candidate_limit,
+            'limit': limit,
+            'active_only': active_only
+        })
+        
+        return results.mappings().all()
+    
+    def search_similar_chunks_binary(
+        self,
+        session: Session,
+        query_embedding: List[float],
+        model_name: str,
+        limit: int = 5,
+        active_only: bool = True,
+        rerank_candidates: int = 100
+    ) -> List[RowMapping]:
+        """
+        Search for similar chunks with binary quantization and reranking.
+
+        Candidates come from the Hamming index over embedding_bit, which is
+        32x smaller than the halfvec vectors; they are then reranked by cosine
+        distance on the stored embedding.
+        
+        Args:
+            session (Session): Session to run in
+            query_embedding (List[float]): Query embedding vector
+            model_name (str): Embedding model of query_embedding; only its vectors are searched
+            limit (int): Maximum number of results
+            active_only (bool): Whether to search only active documents
+            rerank_candidates (int): Number of binary candidates to rerank
             
-        finally:
-            session.close()
+        Returns:
+            List[RowMapping]: List of similar chunks with their document metadata
+        """
+        candidate_limit = max(rerank_candidates, limit)
+
+        session.execute(SET_EF_SEARCH, {'ef_search': str(candidate_limit)})
+        results = session.execute(BINARY_RERANK_QUERY, {
+            'query_bits': Embedding.binary_quantize(query_embedding),
+            'query_embedding': query_embedding,
+            'model_name': model_name,
+            'candidate_limit': candidate_limit,
+            'limit': limit,
+            'active_only': active_only
+        })
+        
+        return results.mappings().all()
     
     def close(self):
         """Close the database connection."""
@@ -1,10 +1,23 @@
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-from typing import List, Dict, Optional, Union, Tuple
+from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
+from googleapiclient.http import MediaIoBaseDownload, set_user_agent
+from google_auth_httplib2 import AuthorizedHttp, Request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterator, List, Dict, Optional, Union
+import asyncio
+import hashlib
+import httplib2
+import httpx
+import orjson
 import os.path
-import io
 import logging
+import random
+import re
+import sqlite3
+import threading
+import time
 from datetime import datetime
 
 # Configure logging
@@ -13,32 +26,300 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+# Socket timeout of the Drive transports; without it a stalled connection blocks a worker forever
+HTTP_TIMEOUT = 30
+
+# Identifies this service in Drive API logs; compression is negotiated by the HTTP clients
+USER_AGENT = 'drivechat-mgmt/1.0'
+
+# Partial-response field mask for file metadata; webViewLink feeds the item URI
+METADATA_FIELDS = 'id,name,mimeType,size,md5Checksum,modifiedTime,parents,webViewLink'
+
+# Suggested location of the opt-in on-disk HTTP cache for metadata (cached
+# entries are revalidated with If-None-Match); per user, created with mode 0700
+HTTP_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'drivechat-gdrive'
+)
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# Downloads are I/O bound, so files are fetched concurrently while
+# FOLDER_WALKERS threads keep listing folders ahead of them
+DOWNLOAD_WORKERS = 16
+FOLDER_WALKERS = 4
+
+# Bytes fetched per media request; the client default of 100 KiB costs a round-trip each
+MEDIA_CHUNK_SIZE = 16 * 1024 * 1024
+# Download progress is logged once per this many bytes rather than on every chunk
+PROGRESS_LOG_INTERVAL = 64 * 1024 * 1024
+# Files above this size are fetched as MEDIA_CHUNK_SIZE ranges over RANGE_WORKERS connections
+PARALLEL_DOWNLOAD_THRESHOLD = 64 * 1024 * 1024
+RANGE_WORKERS = 8
+
+# Drive REST endpoint used by the async download path
+DRIVE_FILES_URL = 'https://www.googleapis.com/drive/v3/files/{file_id}'
+# Connection limits of the shared async HTTP client
+ASYNC_MAX_CONNECTIONS = 256
+ASYNC_MAX_KEEPALIVE = 64
+ASYNC_CHUNK_SIZE = 1 << 20
+# Local state of a download folder (processed files, hashes of existing files),
+# hidden from directory readers
+MANIFEST_NAME = '.manifest.sqlite'
+MANIFEST_COMMIT_EVERY = 500
+MD5_READ_SIZE = 1 << 20
+# Sub-requests per Drive batch call; larger batches are prone to rate limit errors
+METADATA_BATCH_SIZE = 25
+
+# Transient Drive errors are retried with exponential backoff (seconds, capped)
+MAX_TRIES = 6
+MAX_BACKOFF = 64
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# 403 reasons that mean "slow down" rather than "forbidden"
+RATE_LIMIT_REASONS = (b'rateLimitExceeded', b'userRateLimitExceeded')
+
+class _OrjsonModel(JsonModel):
+    """JsonModel that parses API responses with orjson instead of the stdlib json module."""
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return content
+        if self._data_wrapper and isinstance(body, dict) and 'data' in body:
+            body = body['data']
+        return body
+
+
+class _FolderDownload:
+    """
+    Shared state of one download_folder run.
+    
+    Folder walkers and download workers update it from their own threads, so
+    every mutation happens under lock; per-file results go to the manifest
+    database instead of memory. Submitted tasks are counted until they
+    finish; wait() returns once the whole tree has been processed.
+    """
+    def __init__(self,
+                 max_depth: int,
+                 file_types: Optional[List[str]],
+                 skip_existing: bool,
+                 manifest: sqlite3.Connection,
+                 stats: Dict,
+                 walkers: ThreadPoolExecutor,
+                 downloads: ThreadPoolExecutor):
+        self.max_depth = max_depth
+        # Lower-cased once so checking an extension is a single set lookup
+        self.file_types = frozenset(file_type.lower() for file_type in file_types) if file_types else None
+        self.skip_existing = skip_existing
+        self.manifest = manifest
+        self.stats = stats
+        self.recorded = 0
+        self.walkers = walkers
+        self.downloads = downloads
+        self.success = True
+        self.lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Event()
+
+    def submit(self, executor: ThreadPoolExecutor, fn: Callable, *args) -> None:
+        """Run fn(*args) on executor and keep wait() blocked until it returns."""
+        with self.lock:
+            self._pending += 1
+        executor.submit(self._run, fn, *args)
+
+    def _run(self, fn: Callable, *args) -> None:
+        try:
+            fn(*args)
+        finally:
+            with self.lock:
+                self._pending -= 1
+                if not self._pending:
+                    self._idle.set()
+
+    def wait(self) -> None:
+        """Block until every submitted folder and file has been processed."""
+        self._idle.wait()
+
+
 class GoogleDriveClient:
     """A client for interacting with Google Drive API."""
     
-    def __init__(self, credentials_path: str, scopes: List[str] = None):
+    # Matches ?id=<id>, /d/<id> and /folders/<id> shareable links in one pass
+    _LINK_RE = re.compile(r'(?:id=(?P<id>[^&#]+))|(?:/d/(?P<file>[^/?#]+))|(?:/folders/(?P<folder>[^/?#]+))')
+    
+    def __init__(self,
+                 credentials_path: str,
+                 scopes: List[str] = None,
+                 metadata_fields: str = METADATA_FIELDS,
+                 cache_dir: Optional[str] = None):
         """
         Initialize the Google Drive client.
         
         Args:
             credentials_path (str): Path to the service account credentials file
             scopes (List[str], optional): List of OAuth scopes. Defaults to readonly scope.
+            metadata_fields (str, optional): File fields requested from Drive. Defaults to
+                the fields this project reads; pass "*" to get everything
+            cache_dir (str, optional): Directory of the persistent metadata HTTP cache,
+                e.g. HTTP_CACHE_DIR. Defaults to None, which disables caching
         """
         self.logger = logging.getLogger(self.__class__.__name__)
         self.credentials_path = credentials_path
         self.scopes = scopes or ['https://www.googleapis.com/auth/drive.readonly']
+        self.metadata_fields = metadata_fields
+        self.cache_dir = cache_dir
+        if cache_dir:
+            # Cached responses hold file metadata, so only the owner may read them
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            os.chmod(cache_dir, 0o700)
+        self._local = threading.local()
+        self._token_lock = threading.Lock()
+        self._manifest_lock = threading.Lock()
+        self._rate_limit_lock = threading.Lock()
+        self._retry_not_before = 0.0
+        self.credentials = None
         self.service = self._initialize_service()
 
     def _initialize_service(self):
         """Initialize and return the Google Drive service."""
         try:
-            credentials = service_account.Credentials.from_service_account_file(
+            self.credentials = service_account.Credentials.from_service_account_file(
                 self.credentials_path, scopes=self.scopes)
-            return build('drive', 'v3', credentials=credentials)
+            # The constructing thread's service, so its requests share one keep-alive transport
+            return self._thread_service()
         except Exception as e:
             self.logger.error(f"Failed to initialize Google Drive service: {str(e)}")
             return None
 
+    def _authorized_http(self, cache: Optional[str] = None):
+        """Create an authorized HTTP transport, optionally backed by a file cache."""
+        http = AuthorizedHttp(self.credentials, http=httplib2.Http(cache=cache, timeout=HTTP_TIMEOUT))
+        return set_user_agent(http, USER_AGENT)
+
+    def _build_service(self, http=None):
+        """Build a Drive service on the given HTTP transport, or on a new one."""
+        return build('drive', 'v3', http=http or self._authorized_http(), model=_OrjsonModel())
+
+    def _thread_http(self):
+        """
+        Return the calling thread's authorized, uncached HTTP transport.
+
+        httplib2 transports are not thread-safe, so every thread gets its own
+        around the shared credentials.
+        """
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._authorized_http()
+            self._local.http = http
+        return http
+
+    def _thread_service(self):
+        """Return a Drive service owned by the calling thread, built on _thread_http()."""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self._build_service(self._thread_http())
+            self._local.service = service
+        return service
+
+    def _metadata_http(self):
+        """
+        Return the calling thread's transport for metadata reads.
+
+        When cache_dir is set it is backed by that on-disk cache: responses are
+        stored with their ETag and revalidated with If-None-Match, so unchanged
+        files and folder pages come back as empty 304s. Media downloads do not
+        use it, so file contents are never copied into the cache.
+        """
+        http = getattr(self._local, 'metadata_http', None)
+        if http is None:
+            http = self._authorized_http(cache=self.cache_dir)
+            self._local.metadata_http = http
+        return http
+
+    def _is_rate_limited(self, status: int, content: Optional[bytes]) -> bool:
+        """Whether Drive rejected a request for exceeding the request quota."""
+        if status == 429:
+            return True
+        return status == 403 and any(
+            reason in (content or b'') for reason in RATE_LIMIT_REASONS
+        )
+
+    def _retry_delay(self, attempt: int, retry_after: str, rate_limited: bool) -> float:
+        """
+        Seconds to wait before the next attempt; a rate limit also holds back
+        every other request until then.
+        """
+        delay = float(retry_after) if retry_after.isdigit() else \
+            min(MAX_BACKOFF, 2 ** attempt) + random.random()
+        if rate_limited:
+            with self._rate_limit_lock:
+                self._retry_not_before = max(self._retry_not_before, time.monotonic() + delay)
+        return delay
+
+    def _call_with_retry(self, fn: Callable, max_tries: int = MAX_TRIES):
+        """
+        Call fn, retrying transient Drive and network errors with exponential backoff.
+        
+        Rate limits apply to the whole project, so when one thread is told to slow
+        down (honoring Retry-After if sent) every other thread waits as well
+        before its next request.
+        
+        Args:
+            fn (Callable): Function performing one Drive request
+            max_tries (int): Number of attempts before the last error is raised
+        """
+        for attempt in range(max_tries):
+            delay = self._retry_not_before - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            
+            try:
+                return fn()
+            except HttpError as e:
+                rate_limited = self._is_rate_limited(e.resp.status, e.content)
+                if attempt == max_tries - 1 or not (rate_limited or e.resp.status in RETRY_STATUSES):
+                    raise
+                delay = self._retry_delay(attempt, e.resp.get('retry-after', ''), rate_limited)
+                self.logger.warning(f"Drive request failed with {e.resp.status}, retrying in {delay:.1f}s")
+            except (ConnectionError, TimeoutError) as e:
+                if attempt == max_tries - 1:
+                    raise
+                delay = min(MAX_BACKOFF, 2 ** attempt) + random.random()
+                self.logger.warning(f"Drive request failed: {str(e)}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    async def _acall_with_retry(self, fn: Callable[[], Awaitable], max_tries: int = MAX_TRIES):
+        """
+        Async counterpart of _call_with_retry for requests made through httpx.
+        
+        Shares the rate limit deadline with the threaded calls, so an async
+        download told to slow down holds back the sync API calls too, and vice versa.
+        
+        Args:
+            fn (Callable): Coroutine function performing one Drive request
+            max_tries (int): Number of attempts before the last error is raised
+        """
+        for attempt in range(max_tries):
+            delay = self._retry_not_before - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            try:
+                return await fn()
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                rate_limited = self._is_rate_limited(status, e.response.content)
+                if attempt == max_tries - 1 or not (rate_limited or status in RETRY_STATUSES):
+                    raise
+                delay = self._retry_delay(attempt, e.response.headers.get('retry-after', ''), rate_limited)
+                self.logger.warning(f"Drive request failed with {status}, retrying in {delay:.1f}s")
+            except httpx.TransportError as e:
+                if attempt == max_tries - 1:
+                    raise
+                delay = min(MAX_BACKOFF, 2 ** attempt) + random.random()
+                self.logger.warning(f"Drive request failed: {str(e)}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
     def _get_file_metadata(self, file_id: str) -> Optional[Dict]:
         """
         Get detailed metadata for a file.
@@ -50,23 +331,54 @@ class GoogleDriveClient:
             Optional[Dict]: File metadata or None if not found
         """
         try:
-            return self.service.files().get(
+            request = self._thread_service().files().get(
                 fileId=file_id,
-                fields="*"  # Request all available fields
-            ).execute()
+                fields=self.metadata_fields
+            )
+            return self._call_with_retry(lambda: request.execute(http=self._metadata_http()))
         except Exception as e:
             self.logger.error(f"Error getting metadata for file {file_id}: {str(e)}")
             return None
+
+    def batch_get_metadata(self, file_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Get the metadata of many files with Drive batch requests.
+        
+        Up to METADATA_BATCH_SIZE lookups share one HTTP round-trip.
+        
+        Args:
+            file_ids (List[str]): IDs of the files
+            
+        Returns:
+            Dict[str, Dict]: Metadata by file ID; files that could not be read are missing
+        """
+        metadata = {}
+        
+        def _collect(request_id, response, exception):
+            if exception is not None:
+                self.logger.error(f"Error getting metadata for file {request_id}: {str(exception)}")
+                return
+            metadata[request_id] = response
+        
+        service = self._thread_service()
+        for start in range(0, len(file_ids), METADATA_BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=_collect)
+            for file_id in file_ids[start:start + METADATA_BATCH_SIZE]:
+                batch.add(service.files().get(fileId=file_id, fields=self.metadata_fields), request_id=file_id)
+            try:
+                self._call_with_retry(batch.execute)
+            except Exception as e:
+                self.logger.error(f"Error executing metadata batch: {str(e)}")
+        return metadata
         
     def get_gdrive_id(self, shareable_link: str):
         """Extract the file or folder ID from a Google Drive shareable link."""
-        if "id=" in shareable_link:
-            return ((shareable_link.split("id=")[-1].split("&")[0], 'file'))    
-        elif "/d/" in shareable_link:
-            return ((shareable_link.split("/d/")[-1].split("/")[0], 'file'))
-        elif "/folders/" in shareable_link:
-            return ((shareable_link.split("/folders/")[-1].split("/")[0], 'folder'))
-        return None
+        match = self._LINK_RE.search(shareable_link)
+        if not match:
+            return None
+        if match.group('folder'):
+            return (match.group('folder'), 'folder')
+        return (match.group('id') or match.group('file'), 'file')
 
 
     def list_folder_contents(self, folder_id: str) -> List[Dict]:
@@ -83,41 +395,55 @@ class GoogleDriveClient:
             self.logger.error("Google Drive service not initialized")
             return []
 
-        query = f"'{folder_id}' in parents and trashed = false"
-        results = []
-        page_token = None
-        
         try:
-            while True:
-                response = self.service.files().list(
-                    q=query,
-                    spaces='drive',
-                    fields='nextPageToken, files(*)',  # Request all available fields
-                    pageToken=page_token
-                ).execute()
-                
-                results.extend(response.get('files', []))
-                page_token = response.get('nextPageToken')
-                
-                if not page_token:
-                    break
-                    
-            return results
+            return [item for page in self._iter_folder_pages(folder_id) for item in page]
         except Exception as e:
             self.logger.error(f"Error listing files in folder {folder_id}: {str(e)}")
             return []
 
-    def download_file(self, file_id: str, save_path: str) -> Dict:
+    def _iter_folder_pages(self, folder_id: str) -> Iterator[List[Dict]]:
+        """
+        Yield the contents of a Google Drive folder one listing page at a time.
+        
+        Args:
+            folder_id (str): The ID of the folder to list contents from
+        """
+        query = f"'{folder_id}' in parents and trashed = false"
+        page_token = None
+        
+        while True:
+            request = self._thread_service().files().list(
+                q=query,
+                spaces='drive',
+                fields=f'nextPageToken, files({self.metadata_fields})',
+                pageToken=page_token
+            )
+            response = self._call_with_retry(lambda: request.execute(http=self._metadata_http()))
+            
+            yield response.get('files', [])
+            page_token = response.get('nextPageToken')
+            
+            if not page_token:
+                break
+
+    def download_file(self, file_id: str, save_path: str, file_metadata: Optional[Dict] = None) -> Dict:
         """
         Download a single file from Google Drive and return its metadata.
         
+        The local name and the choice between a streamed and a ranged download
+        depend on the metadata, so it has to be known before the media request.
+        Pass it in whenever it is at hand (folder listings and batch_get_metadata
+        already carry it); only then is the download a single round-trip.
+        
         Args:
             file_id (str): The ID of the file to download
             save_path (str): Path where the file should be saved
+            file_metadata (Dict, optional): Already fetched metadata of the file,
+                e.g. from a folder listing; fetched with an extra GET when not given
             
         Returns:
-            Tuple[bool, Optional[Dict]]: (success status, file metadata)
-                The metadata dictionary includes all available file information
+            Dict: success flag, error message and, under 'files', the file metadata
+                extended with local_path, download_time and local_size
         """
         if not self.service:
             message = "Google Drive service not initialized"
@@ -130,7 +456,7 @@ class GoogleDriveClient:
 
         try:
             # Get complete file metadata
-            file_metadata = self._get_file_metadata(file_id)
+            file_metadata = file_metadata or self._get_file_metadata(file_id)
             if not file_metadata:
                 return {
                     'success': False, 
@@ -138,28 +464,185 @@ class GoogleDriveClient:
                     'error': "File not found"
                 }
 
-            request = self.service.files().get_media(fileId=file_id)
+            os.makedirs(save_path, exist_ok=True)
+            save_name = os.path.join(save_path, file_metadata['name'])
+            size = int(file_metadata.get('size', 0))
+            started = time.monotonic()
             
-            # Create a BytesIO object for the download
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
+            if size > PARALLEL_DOWNLOAD_THRESHOLD:
+                self._download_ranges(file_id, save_name, size)
+                local_size = size
+            else:
+                request = self._thread_service().files().get_media(fileId=file_id)
+                
+                # Stream the chunks straight into the file instead of buffering it in memory
+                with open(save_name, 'wb') as fh:
+                    downloader = MediaIoBaseDownload(fh, request, chunksize=MEDIA_CHUNK_SIZE)
+                    done = False
+                    logged = 0
+                    while not done:
+                        status, done = self._call_with_retry(downloader.next_chunk)
+                        if status and status.resumable_progress // PROGRESS_LOG_INTERVAL > logged:
+                            logged = status.resumable_progress // PROGRESS_LOG_INTERVAL
+                            self.logger.info("Download Progress: %d%%", int(status.progress() * 100))
+                    local_size = fh.tell()
             
-            # Download the file
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-                if status:
-                    self.logger.info(f"Download Progress: {int(status.progress() * 100)}%")
+            # Add local file information to metadata
+            file_metadata.update({
+                'local_path': save_name,
+                'download_time': datetime.now().isoformat(),
+                'local_size': local_size
+            })
+                
+            self.logger.info(
+                "File '%s' downloaded successfully to %s in %.2fs",
+                file_metadata['name'], save_name, time.monotonic() - started
+            )
+            return {
+                'success': True, 
+                'error': None,
+                'files': file_metadata, 
+                'message': None
+            }
             
-            # Save the file
-            fh.seek(0)
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        except Exception as e:
+            self.logger.error(f"Error downloading file {file_id}: {str(e)}")
+            return {
+                'success': False, 
+                'files': None, 
+                'error': str(e)
+            }
+
+    def _download_ranges(self, file_id: str, save_name: str, size: int) -> None:
+        """
+        Download a large file as byte ranges fetched over several connections.
+        
+        A single media stream is limited by one connection's throughput. The file
+        is allocated up front and every range is written at its own offset, so
+        the ranges can complete in any order.
+        
+        Args:
+            file_id (str): The ID of the file to download
+            save_name (str): Local path of the file
+            size (int): Size of the file in bytes
+        """
+        url = f"{DRIVE_FILES_URL.format(file_id=file_id)}?alt=media"
+        fd = os.open(save_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            if hasattr(os, 'posix_fallocate'):
+                os.posix_fallocate(fd, 0, size)
+            else:
+                os.ftruncate(fd, size)
+            
+            def _fetch(start: int) -> None:
+                end = min(start + MEDIA_CHUNK_SIZE, size) - 1
+                
+                def _get():
+                    resp, content = self._thread_http().request(url, headers={'Range': f'bytes={start}-{end}'})
+                    if resp.status != 206 or len(content) != end - start + 1:
+                        raise HttpError(resp, content, uri=url)
+                    return content
+                
+                # httplib2 hands back each range as one bytes object, so pwrite is the
+                # only copy left (into the page cache); an mmap of the file would not
+                # avoid it and would add page faults on top
+                os.pwrite(fd, self._call_with_retry(_get), start)
+            
+            self.logger.info(f"Downloading {size} bytes of {file_id} in {RANGE_WORKERS} parallel ranges")
+            with ThreadPoolExecutor(max_workers=RANGE_WORKERS) as pool:
+                # list() surfaces the first failed range
+                list(pool.map(_fetch, range(0, size, MEDIA_CHUNK_SIZE)))
+        finally:
+            os.close(fd)
+
+    def _bearer_token(self, force_refresh: bool = False) -> str:
+        """
+        Return an access token for the Drive REST API, refreshing it when needed.
+        
+        Args:
+            force_refresh (bool): Refresh even if the cached token looks valid,
+                e.g. after the API answered 401
+        """
+        with self._token_lock:
+            if force_refresh or not self.credentials.valid:
+                self.credentials.refresh(Request(httplib2.Http()))
+            return self.credentials.token
+
+    def async_client(self) -> httpx.AsyncClient:
+        """Create an HTTP client to share between concurrent adownload_file calls."""
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_MAX_KEEPALIVE
+            ),
+            timeout=httpx.Timeout(30.0, read=300.0),
+            headers={'User-Agent': USER_AGENT}
+        )
+
+    async def adownload_file(self,
+                             client: httpx.AsyncClient,
+                             file_id: str,
+                             save_path: str,
+                             file_metadata: Optional[Dict] = None) -> Dict:
+        """
+        Download a single file from Google Drive without blocking the event loop.
+        
+        The media is streamed from the REST endpoint straight to disk, so many
+        downloads can share one connection pool instead of holding a thread each.
+        
+        Args:
+            client (httpx.AsyncClient): Client from async_client()
+            file_id (str): The ID of the file to download
+            save_path (str): Directory where the file should be saved
+            file_metadata (Dict, optional): Already fetched metadata of the file
+            
+        Returns:
+            Dict: Same result shape as download_file
+        """
+        if not self.service:
+            message = "Google Drive service not initialized"
+            self.logger.error(message)
+            return {
+                'success': False, 
+                'files': None, 
+                'error': message
+            }
+
+        try:
+            file_metadata = file_metadata or await asyncio.to_thread(self._get_file_metadata, file_id)
+            if not file_metadata:
+                return {
+                    'success': False, 
+                    'files': None, 
+                    'error': "File not found"
+                }
+
+            os.makedirs(save_path, exist_ok=True)
             save_name = os.path.join(save_path, file_metadata['name'])
+            url = DRIVE_FILES_URL.format(file_id=file_id)
             
-            with open(save_name, 'wb') as f:
-                f.write(fh.read())
+            async def _stream_to_file():
+                # Retry once with a fresh token if the cached one was rejected
+                for force_refresh in (False, True):
+                    token = await asyncio.to_thread(self._bearer_token, force_refresh)
+                    async with client.stream(
+                        'GET', url,
+                        params={'alt': 'media'},
+                        headers={'Authorization': f'Bearer {token}'}
+                    ) as response:
+                        if response.status_code == 401 and not force_refresh:
+                            continue
+                        if response.is_error:
+                            # Load the error body so the rate limit reason can be read
+                            await response.aread()
+                        response.raise_for_status()
+                        with open(save_name, 'wb') as f:
+                            async for chunk in response.aiter_bytes(ASYNC_CHUNK_SIZE):
+                                await asyncio.to_thread(f.write, chunk)
+                        return
+            
+            await self._acall_with_retry(_stream_to_file)
             
-            # Add local file information to metadata
             file_metadata.update({
                 'local_path': save_name,
                 'download_time': datetime.now().isoformat(),
@@ -182,121 +665,240 @@ class GoogleDriveClient:
                 'error': str(e)
             }
 
-    def _process_folder(self, 
-                      current_folder_id: str, 
-                      current_path: str, 
-                      depth: int,
-                      max_depth: int,
-                      file_types: Optional[List[str]],
-                      skip_existing: bool,
-                      stats: Dict,
-                      all_files_metadata: List[Dict]) -> bool:
+    def _open_manifest(self, save_path: str) -> sqlite3.Connection:
+        """Open the manifest database of a download folder, creating it if needed."""
+        # Shared by the download workers; access is serialized with _manifest_lock
+        conn = sqlite3.connect(os.path.join(save_path, MANIFEST_NAME), check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS md5_cache (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                md5 TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                size INTEGER,
+                md5 TEXT,
+                local_path TEXT,
+                status TEXT NOT NULL,
+                error_message TEXT,
+                downloaded_at TEXT
+            )
+        """)
+        return conn
+
+    def _local_md5(self, local_path: str, stat: os.stat_result, manifest: sqlite3.Connection) -> str:
+        """
+        MD5 of a local file, reusing the manifest's value while size and mtime are unchanged.
+        """
+        with self._manifest_lock:
+            row = manifest.execute(
+                "SELECT md5 FROM md5_cache WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (local_path, stat.st_mtime_ns, stat.st_size)
+            ).fetchone()
+        if row:
+            return row[0]
+        
+        md5 = hashlib.md5()
+        with open(local_path, 'rb') as f:
+            for block in iter(lambda: f.read(MD5_READ_SIZE), b''):
+                md5.update(block)
+        digest = md5.hexdigest()
+        with self._manifest_lock:
+            manifest.execute(
+                "INSERT OR REPLACE INTO md5_cache (path, mtime_ns, size, md5) VALUES (?, ?, ?, ?)",
+                (local_path, stat.st_mtime_ns, stat.st_size, digest)
+            )
+        return digest
+
+    def _is_up_to_date(self, entry: Optional[os.DirEntry], item: Dict, manifest: sqlite3.Connection) -> bool:
         """
-        Process a folder and its contents for downloading.
+        Check whether a local file matches its Drive copy.
+        
+        The size is compared first so most changed files are caught without hashing;
+        files without a Drive md5Checksum (e.g. Google Docs) only need to exist.
         
         Args:
+            entry (os.DirEntry, optional): Directory entry of the local file, None if missing
+            item (Dict): Drive metadata of the file
+            manifest (sqlite3.Connection): Manifest of the download folder
+        """
+        if entry is None or not entry.is_file():
+            return False
+        stat = entry.stat()
+        if 'size' in item and stat.st_size != int(item['size']):
+            return False
+        if 'md5Checksum' in item:
+            return self._local_md5(entry.path, stat, manifest) == item['md5Checksum']
+        return True
+
+    def _record_file(self,
+                     run: _FolderDownload,
+                     item: Dict,
+                     status: str,
+                     local_path: Optional[str] = None,
+                     error_message: Optional[str] = None) -> None:
+        """
+        Write the outcome for one file of a folder download to the manifest.
+        
+        Rows are committed in batches of MANIFEST_COMMIT_EVERY; download_folder
+        commits the rest when it finishes.
+        """
+        with self._manifest_lock:
+            run.manifest.execute(
+                """
+                INSERT OR REPLACE INTO files
+                    (id, name, size, md5, local_path, status, error_message, downloaded_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    item['id'],
+                    item.get('name'),
+                    int(item['size']) if 'size' in item else None,
+                    item.get('md5Checksum'),
+                    local_path,
+                    status,
+                    error_message,
+                    item.get('download_time')
+                )
+            )
+            run.recorded += 1
+            if run.recorded % MANIFEST_COMMIT_EVERY == 0:
+                run.manifest.commit()
+
+    def _record_failure(self, run: _FolderDownload, item: Dict, status: str, error_msg: str) -> None:
+        """Mark an item of a folder download as failed."""
+        with run.lock:
+            run.success = False
+            run.stats["errors"].append(error_msg)
+        self._record_file(run, item, status, error_message=error_msg)
+        self.logger.error(error_msg)
+
+    def _process_folder(self, run: _FolderDownload, current_folder_id: str, current_path: str, depth: int) -> None:
+        """
+        List a folder and hand its contents to the walker and download pools.
+        
+        Pages are dispatched as soon as they arrive, so downloads overlap with
+        the rest of the listing and with the traversal of other folders. The walk
+        is breadth-first through the walker pool's FIFO queue rather than
+        recursive, so neither the stack nor the listed pages grow with depth.
+        
+        Args:
+            run (_FolderDownload): State of the folder download
             current_folder_id (str): The ID of the current folder
             current_path (str): Current local path for saving files
             depth (int): Current folder depth
-            max_depth (int): Maximum folder depth to traverse
-            file_types (List[str], optional): List of allowed file extensions
-            skip_existing (bool): Whether to skip existing files
-            stats (Dict): Statistics dictionary to update
-            all_files_metadata (List[Dict]): List to store all file metadata
-            
-        Returns:
-            bool: True if all operations were successful, False otherwise
         """
-        if max_depth != -1 and depth > max_depth:
-            return True
-
-        self.logger.info(f"Processing folder at depth {depth}, path: {current_path}")
-        items = self.list_folder_contents(current_folder_id)
+        self.logger.info("Processing folder at depth %d, path: %s", depth, current_path)
+        descend = run.max_depth == -1 or depth < run.max_depth
+        found = 0
         
-        if not items:
-            self.logger.warning(f"No items found in folder {current_folder_id}")
-            return True
-
-        success = True
+        # One directory scan instead of a stat per listed file; missing files are
+        # then known not to exist without touching the file system
+        existing = {}
+        if run.skip_existing and os.path.isdir(current_path):
+            with os.scandir(current_path) as entries:
+                existing = {entry.name: entry for entry in entries}
         
-        for item in items:
-            try:
-                item_path = os.path.join(current_path, item['name'])
-                stats["files_processed"] += 1
-                
-                self.logger.debug(f"Processing item: {item['name']} ({item['mimeType']})")
+        try:
+            for items in self._iter_folder_pages(current_folder_id):
+                found += len(items)
                 
-                if item['mimeType'] == 'application/vnd.google-apps.folder':
-                    self.logger.info(f"Found subfolder: {item['name']}")
-                    os.makedirs(item_path, exist_ok=True)
-                    if not self._process_folder(
-                        item['id'], 
-                        item_path, 
-                        depth + 1,
-                        max_depth,
-                        file_types,
-                        skip_existing,
-                        stats,
-                        all_files_metadata
-                    ):
-                        success = False
-                else:
-                    # Check file type filter
-                    if file_types:
-                        file_ext = os.path.splitext(item['name'])[1].lower()
-                        if file_ext not in file_types:
-                            self.logger.info(f"Skipping file {item['name']} - type {file_ext} not in allowed types")
-                            stats["files_skipped"] += 1
-                            item['download_status'] = 'skipped_file_type'
-                            all_files_metadata.append(item)
+                for item in items:
+                    try:
+                        name = item['name']
+                        mime_type = item['mimeType']
+                        with run.lock:
+                            run.stats["files_processed"] += 1
+                        
+                        self.logger.debug("Processing item: %s (%s)", name, mime_type)
+                        
+                        if mime_type == FOLDER_MIME_TYPE:
+                            # Folders past max_depth are neither created nor listed
+                            if descend:
+                                self.logger.info("Found subfolder: %s", name)
+                                item_path = os.path.join(current_path, name)
+                                os.makedirs(item_path, exist_ok=True)
+                                run.submit(run.walkers, self._process_folder, run, item['id'], item_path, depth + 1)
                             continue
-                    
-                    # Check if file exists
-                    if skip_existing and os.path.exists(os.path.join(current_path, item['name'])):
-                        self.logger.info(f"Skipping existing file: {item['name']}")
-                        stats["files_skipped"] += 1
-                        item['download_status'] = 'skipped_existing'
-                        item['local_path'] = os.path.join(current_path, item['name'])
-                        all_files_metadata.append(item)
-                        continue
-                    
-                    # Download file
-                    self.logger.info(f"Downloading file: {item['name']}")
-                    result = self.download_file(item['id'], current_path)
-                    
-                    if result['success'] and result['files']:
-                        stats["files_downloaded"] += 1
-                        stats["bytes_downloaded"] += int(result['files'].get('size', 0))
-                        result['files']['download_status'] = 'success'
-                        all_files_metadata.append(result['files'])
-                        self.logger.info(f"Successfully downloaded: {item['name']}")
-                    else:
-                        success = False
-                        item['download_status'] = 'failed'
-                        item['error_message'] = result.get('error', 'Unknown error')
-                        all_files_metadata.append(item)
-                        error_msg = f"Failed to download {item['name']}: {result.get('error', 'Unknown error')}"
-                        stats["errors"].append(error_msg)
-                        self.logger.error(error_msg)
                         
-            except Exception as e:
-                success = False
-                item['download_status'] = 'error'
-                item['error_message'] = str(e)
-                all_files_metadata.append(item)
-                error_msg = f"Error processing {item['name']}: {str(e)}"
-                stats["errors"].append(error_msg)
-                self.logger.error(error_msg)
+                        # Check file type filter here so skipped files never reach the download pool
+                        if run.file_types:
+                            file_ext = os.path.splitext(name)[1].lower()
+                            if file_ext not in run.file_types:
+                                self.logger.info("Skipping file %s - type %s not in allowed types", name, file_ext)
+                                with run.lock:
+                                    run.stats["files_skipped"] += 1
+                                self._record_file(run, item, 'skipped_file_type')
+                                continue
+                        
+                        run.submit(run.downloads, self._process_file, run, item, current_path, existing.get(name))
+                            
+                    except Exception as e:
+                        self._record_failure(run, item, 'error', f"Error processing {item['name']}: {str(e)}")
+                        
+        except Exception as e:
+            self.logger.error(f"Error listing files in folder {current_folder_id}: {str(e)}")
+        
+        if not found:
+            self.logger.warning("No items found in folder %s", current_folder_id)
+        self.logger.info("Finished listing folder at %s", current_path)
+
+    def _process_file(self,
+                      run: _FolderDownload,
+                      item: Dict,
+                      current_path: str,
+                      local_entry: Optional[os.DirEntry] = None) -> None:
+        """
+        Skip or download a single file of a folder download.
+        
+        Args:
+            run (_FolderDownload): State of the folder download
+            item (Dict): Drive metadata of the file, as returned by the listing
+            current_path (str): Local folder the file belongs in
+            local_entry (os.DirEntry, optional): Existing local file of the same name
+        """
+        try:
+            name = item['name']
+            item_path = os.path.join(current_path, name)
+            
+            # Check if an identical copy of the file exists
+            if run.skip_existing and self._is_up_to_date(local_entry, item, run.manifest):
+                self.logger.info("Skipping existing file: %s", name)
+                with run.lock:
+                    run.stats["files_skipped"] += 1
+                self._record_file(run, item, 'skipped_existing', item_path)
+                return
+            
+            # Download file; the listing already carries its metadata, so no extra GET is needed
+            self.logger.debug("Downloading file: %s", name)
+            result = self.download_file(item['id'], current_path, item)
+            
+            if result['success'] and result['files']:
+                file_metadata = result['files']
+                with run.lock:
+                    run.stats["files_downloaded"] += 1
+                    run.stats["bytes_downloaded"] += int(file_metadata.get('size', 0))
+                self._record_file(run, file_metadata, 'success', file_metadata['local_path'])
+            else:
+                self._record_failure(
+                    run, item, 'failed',
+                    f"Failed to download {name}: {result.get('error', 'Unknown error')}"
+                )
                 
-        self.logger.info(f"Finished processing folder at {current_path}. Success: {success}")
-        return success
+        except Exception as e:
+            self._record_failure(run, item, 'error', f"Error processing {item['name']}: {str(e)}")
 
     def download_folder(self, 
                        folder_id: str, 
                        save_path: str, 
                        file_types: Optional[List[str]] = None,
                        max_depth: int = -1,
-                       skip_existing: bool = False) -> Dict[str, Union[bool, Dict, List[Dict]]]:
+                       skip_existing: bool = False) -> Dict[str, Union[bool, Dict, str]]:
         """
         Recursively download files from a Google Drive folder.
         
@@ -305,13 +907,15 @@ class GoogleDriveClient:
             save_path (str): Path where files should be saved
             file_types (List[str], optional): List of file extensions to download
             max_depth (int, optional): Maximum folder depth to traverse (-1 for unlimited)
-            skip_existing (bool, optional): Skip files that already exist locally
+            skip_existing (bool, optional): Skip files whose local copy matches the
+                size and MD5 checksum reported by Drive
             
         Returns:
             Dict: Summary of the download operation including:
                 - success: bool indicating overall success
                 - stats: download statistics
-                - files: list of metadata for all processed files
+                - manifest: path of the SQLite manifest whose files table holds
+                  the outcome of every file processed by this run
                 - error: error message if failed
         """
         if not self.service:
@@ -320,7 +924,7 @@ class GoogleDriveClient:
                 "success": False,
                 "error": "Service not initialized",
                 "stats": {},
-                "files": []
+                "manifest": None
             }
 
         stats = {
@@ -332,20 +936,31 @@ class GoogleDriveClient:
             "start_time": datetime.now()
         }
         
-        all_files_metadata = []
+        manifest_path = os.path.join(save_path, MANIFEST_NAME)
 
         try:
             os.makedirs(save_path, exist_ok=True)
-            success = self._process_folder(
-                folder_id, 
-                save_path, 
-                0,
-                max_depth,
-                file_types,
-                skip_existing,
-                stats,
-                all_files_metadata
-            )
+            manifest = self._open_manifest(save_path)
+            try:
+                # The files table describes this run only; the md5 cache is kept
+                manifest.execute("DELETE FROM files")
+                with ThreadPoolExecutor(max_workers=FOLDER_WALKERS) as walkers, \
+                        ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as downloads:
+                    run = _FolderDownload(
+                        max_depth,
+                        file_types,
+                        skip_existing,
+                        manifest,
+                        stats,
+                        walkers,
+                        downloads
+                    )
+                    run.submit(walkers, self._process_folder, run, folder_id, save_path, 0)
+                    run.wait()
+                success = run.success
+            finally:
+                manifest.commit()
+                manifest.close()
             
             # Calculate duration and add to stats
             stats["end_time"] = datetime.now()
@@ -354,7 +969,7 @@ class GoogleDriveClient:
             return {
                 "success": success,
                 "stats": stats,
-                "files": all_files_metadata
+                "manifest": manifest_path
             }
             
         except Exception as e:
@@ -363,6 +978,6 @@ class GoogleDriveClient:
                 "success": False,
                 "error": str(e),
                 "stats": stats,
-                "files": all_files_metadata
+                "manifest": manifest_path
             }
 